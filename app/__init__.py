@@ -1,14 +1,18 @@
 # app/__init__.py
 import logging
+from typing import Optional
 from openai import AsyncOpenAI
 from .core.config import get_settings
+from .core.http import HttpTransport
 
 logger = logging.getLogger(__name__)
 
-async def verify_api_key():
-    """验证 API key 是否有效"""
+async def verify_api_key(transport: Optional[HttpTransport] = None):
+    """验证 API key 是否有效，传入 transport 时复用共享连接池"""
     settings = get_settings()
-    client = AsyncOpenAI(api_key=settings.API_KEY)
+    owns_transport = transport is None
+    transport = transport or HttpTransport()
+    client = AsyncOpenAI(api_key=settings.API_KEY, http_client=transport.client, timeout=settings.OPENAI_TIMEOUT)
     try:
         # 尝试一个简单的API调用
         response = await client.chat.completions.create(
@@ -20,4 +24,7 @@ async def verify_api_key():
         return True
     except Exception as e:
         logger.error(f"API key verification failed: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+    finally:
+        if owns_transport:
+            await transport.close()
\ No newline at end of file
@@ -0,0 +1,29 @@
+# admin.py 运维查询路由
+
+from fastapi import APIRouter, Depends, Request
+from ..core.http import HttpTransport
+from ..services.translator import TranslationService
+from .translate import get_translation_service, hot_request_cache
+
+router = APIRouter(prefix="/admin")
+
+def get_http_transport(request: Request) -> HttpTransport:
+    return request.app.state.http_transport
+
+@router.get("/hotkeys")
+async def get_hot_keys(top: int = 20, service: TranslationService = Depends(get_translation_service)):
+    """查看请求和分块的热点统计"""
+    return {
+        "requests": hot_request_cache.stats(top),
+        "chunks": service.hot_chunks.stats(top),
+    }
+
+@router.get("/tiers")
+async def get_tier_stats(service: TranslationService = Depends(get_translation_service)):
+    """查看各模型档位的调用次数、延迟和token用量"""
+    return service.tier_stats.stats()
+
+@router.get("/http")
+async def get_http_stats(transport: HttpTransport = Depends(get_http_transport)):
+    """查看共享连接池的连接数、新建连接和复用次数"""
+    return transport.stats()
@@ -0,0 +1,35 @@
+# responses.py 响应编码与压缩
+
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from ..core.config import get_settings
+from ..core.tracing import span
+from ..utils.encoding import PreparedResponse, negotiate_encoding
+
+settings = get_settings()
+
+async def json_response(request: Request, data=None, prepared: Optional[PreparedResponse] = None) -> Response:
+    """
+    返回JSON响应，超过阈值时按 Accept-Encoding 协商压缩；大响应在线程池中压缩
+    """
+    if prepared is None:
+        with span("encode"):
+            prepared = PreparedResponse.from_data(data)
+
+    encoding = None
+    if len(prepared.body) >= settings.COMPRESSION_MIN_BYTES:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        with span("compress", encoding=encoding, bytes=len(prepared.body)):
+            if encoding in prepared.variants or len(prepared.body) < settings.COMPRESSION_THREAD_MIN_BYTES:
+                body = prepared.encoded(encoding)
+            else:
+                body = await run_in_threadpool(prepared.encoded, encoding)
+    else:
+        body = prepared.body
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,49 +1,191 @@
 # translate.py API 路由
 
+import asyncio
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from ..services.translator import TranslationService
 from ..services.cache import TranslationCache
+from ..services.admission import AdmissionController, AdmissionRejected, PRIORITY_INTERACTIVE
+from ..services.hotkeys import HotKeyCache
+from ..services.fetcher import PageFetcher, FetchError
+from ..utils.text import TextProcessor
+from ..utils.encoding import PreparedResponse
+from .responses import json_response
+from ..core.config import get_settings
+from ..core.logging import log_payload
+from ..core.tracing import span
 
 import logging
-from fastapi import Request, Depends
+from fastapi import Request, Depends, Header
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 router = APIRouter()
 # translation_service = TranslationService()
 cache_service = TranslationCache()
-
-from main import translation_service
+admission_controller = AdmissionController()
+# 高频请求的响应预先序列化（及压缩）后常驻内存
+hot_request_cache = HotKeyCache()
+# 已登记的租户key，请求头中的其他key不能用来获得新的配额
+tenant_api_keys = frozenset(key.strip() for key in settings.TENANT_API_KEYS.split(",") if key.strip())
 
 class TranslateRequest(BaseModel):
     text: str
     from_lang: str = "en"
     to_lang: str = "zh"
 
+class TranslateUrlRequest(BaseModel):
+    url: str
+    from_lang: str = "en"
+    to_lang: str = "zh"
+
+class TranslateUrlsRequest(BaseModel):
+    urls: List[str]
+    from_lang: str = "en"
+    to_lang: str = "zh"
+
+class AdmissionParams:
+    """从请求头解析准入控制参数"""
+
+    def __init__(
+        self,
+        request: Request,
+        x_api_key: Optional[str] = Header(None),
+        x_priority: str = Header(PRIORITY_INTERACTIVE),
+        x_deadline_ms: Optional[float] = Header(None),
+    ):
+        # 只有已登记的API key才单独计算配额，其余按客户端地址区分租户
+        if x_api_key and x_api_key in tenant_api_keys:
+            self.tenant = x_api_key
+        else:
+            self.tenant = request.client.host if request.client else "anonymous"
+        self.priority = x_priority.lower()
+        self.deadline = x_deadline_ms / 1000 if x_deadline_ms is not None else None
+
 def get_translation_service(request: Request) -> TranslationService:
     return request.app.state.translation_service
 
+def get_page_fetcher(request: Request) -> PageFetcher:
+    return request.app.state.page_fetcher
+
+def get_admission_controller() -> AdmissionController:
+    return admission_controller
+
 @router.post("/translate")
-async def translate_text(request: TranslateRequest, service: TranslationService = Depends(get_translation_service)):
-    logger.info(f"Received translation request for text: {request.text[:50]}...")
+async def translate_text(
+    request: TranslateRequest,
+    http_request: Request,
+    params: AdmissionParams = Depends(),
+    service: TranslationService = Depends(get_translation_service),
+    admission: AdmissionController = Depends(get_admission_controller),
+):
+    # 热点请求直接返回预序列化的响应，不占用准入槽位
+    request_key = cache_service._get_cache_key(request.text)
+    is_hot = hot_request_cache.record(request_key)
+    pinned = hot_request_cache.get(request_key)
+    if pinned is not None:
+        response = await json_response(http_request, prepared=pinned)
+        # 本次请求可能生成了新的压缩版本，重新计入常驻层的字节数
+        hot_request_cache.pin(request_key, pinned)
+        return response
+
+    # 磁盘缓存中保存了编码后的响应体，命中时不再解析和序列化
+    with span("cache.get", encoded=True) as attrs:
+        body = cache_service.get_response(request.text)
+        attrs["hit"] = body is not None
+    if body is not None:
+        prepared = PreparedResponse(body)
+    else:
+        translated = await _admit_and_translate(request.text, params, service, admission)
+        prepared = PreparedResponse.from_data({"translated_text": translated})
+        cache_service.set_response(request.text, prepared.body)
+    response = await json_response(http_request, prepared=prepared)
+    if is_hot and settings.CACHE_ENABLED:
+        hot_request_cache.pin(request_key, prepared)
+    return response
+
+@router.post("/translate/url")
+async def translate_url(
+    request: TranslateUrlRequest,
+    http_request: Request,
+    params: AdmissionParams = Depends(),
+    service: TranslationService = Depends(get_translation_service),
+    admission: AdmissionController = Depends(get_admission_controller),
+    fetcher: PageFetcher = Depends(get_page_fetcher),
+):
+    try:
+        text = await fetcher.fetch_text(request.url)
+    except FetchError as e:
+        logger.error(f"Fetch failed: {str(e)}")
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    translated = await _admit_and_translate(text, params, service, admission)
+    return await json_response(http_request, {"url": request.url, "translated_text": translated})
+
+@router.post("/translate/urls")
+async def translate_urls(
+    request: TranslateUrlsRequest,
+    http_request: Request,
+    params: AdmissionParams = Depends(),
+    service: TranslationService = Depends(get_translation_service),
+    admission: AdmissionController = Depends(get_admission_controller),
+    fetcher: PageFetcher = Depends(get_page_fetcher),
+):
+    if len(request.urls) > settings.URL_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {settings.URL_BATCH_MAX} URLs per request")
+
+    async def translate_one(url: str) -> dict:
+        try:
+            text = await fetcher.fetch_text(url)
+            translated = await _admit_and_translate(text, params, service, admission)
+            return {"url": url, "translated_text": translated}
+        except FetchError as e:
+            return {"url": url, "error": str(e), "status_code": e.status_code}
+        except HTTPException as e:
+            return {"url": url, "error": e.detail, "status_code": e.status_code}
+
+    results = await asyncio.gather(*[translate_one(url) for url in request.urls])
+    return await json_response(http_request, {"results": results})
+
+async def _admit_and_translate(
+    text: str,
+    params: AdmissionParams,
+    service: TranslationService,
+    admission: AdmissionController,
+) -> str:
+    logger.info("Received translation request (%d chars)", len(text))
+    log_payload(logger, "Request text", text)
+    # 缓存命中不占用准入槽位和租户配额，也不计入处理速度估计
+    with span("cache.get") as attrs:
+        cached = cache_service.get(text)
+        attrs["hit"] = cached is not None
+    if cached:
+        logger.info("Found in cache")
+        return cached
+
+    # 输入和输出各估算一份token
+    estimated_tokens = 2 * TextProcessor.estimate_tokens(text)
+    try:
+        async with admission.admit(params.tenant, params.priority, estimated_tokens, params.deadline):
+            return await _translate(text, service)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
+
+async def _translate(text: str, service: TranslationService) -> str:
     try:
-        # 先检查缓存
-        cached = cache_service.get(request.text)
-        if cached:
-            logger.info("Found in cache")
-            return {"translated_text": cached}
-        
         logger.info("Calling translation service...")
-        logger.info(f"Request text: {request.text}")
-        translated = await service.translate_chunks(request.text)
-        logger.info(f"Translation completed: {translated[:50]}...")
-        
+        translated = await service.translate_chunks(text)
+        logger.info("Translation completed (%d chars)", len(translated))
+        log_payload(logger, "Translated text", translated)
+
         # 保存到缓存
-        cache_service.set(request.text, translated)
-        
-        return {"translated_text": translated}
+        with span("cache.set"):
+            cache_service.set(text, translated)
+
+        return translated
     except Exception as e:
         logger.error(f"Translation failed: {str(e)}")
         logger.exception("Full traceback:")
         # 错误时返回400而不是200
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
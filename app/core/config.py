@@ -6,10 +6,21 @@ class Settings(BaseSettings):
     # 应用基础配置
     APP_NAME: str = "Better Translator"
     LOG_LEVEL: str = "INFO"
+    LOG_DIR: str = "logs"
+    # 请求和译文内容的日志采样率及最大长度
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.01
+    LOG_PAYLOAD_MAX_CHARS: int = 200
+
+    # 请求追踪：按采样率导出，超过慢请求阈值的始终导出
+    TRACE_ENABLED: bool = True
+    TRACE_SAMPLE_RATE: float = 0.1
+    TRACE_SLOW_MS: float = 2000.0
 
     # 缓存配置
     CACHE_ENABLED: bool = True
     CACHE_DIR: str = "./cache"
+    # 启动时加载的只读缓存快照，留空则不加载
+    CACHE_SNAPSHOT_PATH: str = ""
 
     # OpenAI配置
     API_KEY: str = ""
@@ -19,8 +30,99 @@ class Settings(BaseSettings):
     ERNIE_SECRET_KEY: str = ""
     ERNIE_API_URL: str = "https://aip.baidubce.com/rpc/2.0/ai_custom/v1/wenxinworkshop/chat/completions"
 
-    # 选择使用哪个翻译服务："openai" 或 "ernie"
+    # 选择使用哪个翻译服务："openai"、"ernie" 或 "local"
     TRANSLATOR_TYPE: str = "openai"
+    # 段落缺失或错位时的最大重试次数，只重发出问题的段落
+    SEGMENT_MAX_RETRIES: int = 2
+
+    # 文档术语表：先提取全文关键术语并统一译法，所有块并行翻译时共享，按文档哈希缓存
+    GLOSSARY_ENABLED: bool = True
+    GLOSSARY_MIN_CHUNKS: int = 2
+    GLOSSARY_MAX_TERMS: int = 40
+    GLOSSARY_CACHED_DOCUMENTS: int = 256
+
+    # 本地CPU翻译模型（CTranslate2格式），TRANSLATOR_TYPE 为 "local" 时作为主翻译服务，
+    # 否则用于短文本和上游配额耗尽时的溢出流量
+    LOCAL_MODEL_PATH: str = ""
+    LOCAL_MAX_BATCH_SIZE: int = 16
+    LOCAL_BATCH_WAIT_MS: float = 10.0
+    LOCAL_WORKERS: int = 1
+    LOCAL_THREADS: int = 4
+    LOCAL_SHORT_TEXT_MAX_CHARS: int = 0
+
+    # 模型分档：按块的长度、复杂度和内容类型选择模型，max_tokens 按预估译文长度设置
+    TIERING_ENABLED: bool = True
+    TIER_FAST_MODEL: str = "gpt-4o-mini"
+    TIER_STANDARD_MODEL: str = "gpt-4o"
+    TIER_LARGE_MODEL: str = "gpt-4o"
+    # 文心快速档和大模型档的接口地址，留空时与标准档相同
+    ERNIE_FAST_API_URL: str = ""
+    ERNIE_LARGE_API_URL: str = ""
+    # 输入不超过该token数且不复杂的块走快速档
+    TIER_FAST_MAX_TOKENS: int = 48
+    # 复杂度和长度都超过阈值的块走大模型档
+    TIER_LARGE_MIN_TOKENS: int = 200
+    TIER_LARGE_MIN_COMPLEXITY: float = 0.35
+    # 译文token数 ≈ 输入token数 × 该系数；输入token数按字符粗略估算，系数留出余量。
+    # 译文被截断时按失败处理，重试时升档并加倍上限；估算超过 TIER_MAX_OUTPUT_TOKENS 时不设上限
+    TIER_OUTPUT_TOKEN_RATIO: float = 3.0
+    TIER_MIN_OUTPUT_TOKENS: int = 256
+    TIER_MAX_OUTPUT_TOKENS: int = 4096
+    # 配置了本地模型时，快速档直接交给本地模型
+    TIER_FAST_LOCAL: bool = False
+
+    # 共享HTTP连接池：OpenAI、文心和网页抓取复用同一组连接
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 32
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    # 需要安装 h2，未安装时自动退回 HTTP/1.1
+    HTTP2_ENABLED: bool = True
+    # 启动时预先建立到上游的连接
+    HTTP_WARMUP_ENABLED: bool = True
+    HTTP_WARMUP_CONNECTIONS: int = 2
+    HTTP_WARMUP_TIMEOUT: float = 3.0
+    # 各上游的请求超时（秒），网页抓取见 FETCH_TIMEOUT
+    OPENAI_TIMEOUT: float = 60.0
+    ERNIE_TIMEOUT: float = 60.0
+
+    # 准入控制配置
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENT: int = 16
+    ADMISSION_MAX_QUEUE: int = 64
+    ADMISSION_BULK_MAX_QUEUE: int = 16
+    ADMISSION_DEFAULT_DEADLINE: float = 30.0
+    TENANT_TOKENS_PER_SECOND: float = 2000.0
+    TENANT_TOKEN_BURST: float = 20000.0
+    # 已登记的租户API key（逗号分隔）；未登记的 X-API-Key 不作为租户，按客户端地址限额
+    TENANT_API_KEYS: str = ""
+
+    # 热点key配置
+    HOT_KEY_TRACKER_CAPACITY: int = 1024
+    HOT_KEY_MIN_HITS: int = 5
+    HOT_KEY_MAX_PINNED: int = 512
+    # 常驻层总字节数上限，含各压缩版本
+    HOT_KEY_MAX_PINNED_BYTES: int = 64 * 1024 * 1024
+    HOT_KEY_DECAY_WINDOW: int = 100000
+
+    # 网页抓取配置
+    FETCH_MAX_CONNECTIONS: int = 32
+    FETCH_TIMEOUT: float = 15.0
+    FETCH_MAX_BYTES: int = 5 * 1024 * 1024
+    FETCH_CACHED_PAGES: int = 256
+    # 默认只抓取公网地址（含重定向后的地址），内网部署需要抓取内网页面时再打开
+    FETCH_ALLOW_PRIVATE_NETWORKS: bool = False
+    FETCH_MAX_REDIRECTS: int = 5
+    EXTRACT_WORKERS: int = 4
+    URL_BATCH_MAX: int = 20
+
+    # 响应压缩：超过 COMPRESSION_MIN_BYTES 时按 Accept-Encoding 压缩，
+    # 超过 COMPRESSION_THREAD_MIN_BYTES 时在线程池中压缩
+    COMPRESSION_MIN_BYTES: int = 1024
+    COMPRESSION_THREAD_MIN_BYTES: int = 256 * 1024
+    # 请求体（解压后）最大字节数
+    MAX_REQUEST_BODY_BYTES: int = 20 * 1024 * 1024
     
     model_config = ConfigDict(
         env_file='.env',
@@ -0,0 +1,232 @@
+import time
+import socket
+import asyncio
+import logging
+import ipaddress
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import httpx
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import DefaultResolver
+
+from ..core.config import get_settings
+
+try:
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+except ImportError:  # pragma: no cover - 未安装时只使用 HTTP/1.1
+    h2 = None
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class BlockedAddressError(OSError):
+    """目标主机不是公网地址"""
+
+
+def is_public_address(host: str) -> bool:
+    """判断IP地址是否为公网地址，回环、内网、链路本地（含云元数据地址）等均不是"""
+    try:
+        ip = ipaddress.ip_address(host.split("%", 1)[0])
+    except ValueError:
+        return False
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global
+
+
+class PublicAddressResolver(AbstractResolver):
+    """
+    只返回公网地址的DNS解析器：在建立连接时过滤，域名重新解析到内网地址也无法绕过
+    """
+
+    def __init__(self):
+        self._resolver = DefaultResolver()
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> List[Dict[str, Any]]:
+        hosts = await self._resolver.resolve(host, port, family)
+        public = [entry for entry in hosts if is_public_address(entry["host"])]
+        if not public:
+            raise BlockedAddressError(f"{host} does not resolve to a public address")
+        return public
+
+    async def close(self):
+        await self._resolver.close()
+
+
+class HttpTransport:
+    """
+    所有上游共享的HTTP连接池：OpenAI 使用 httpx 客户端，文心和网页抓取使用 aiohttp 会话。
+    连接数有上限，空闲连接按 keep-alive 时间保留，启动时可预先建立连接
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        max_connections_per_host: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        http2: Optional[bool] = None,
+    ):
+        self.max_connections = max_connections or settings.HTTP_MAX_CONNECTIONS
+        self.max_keepalive_connections = max_keepalive_connections or settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+        self.max_connections_per_host = max_connections_per_host or settings.HTTP_MAX_CONNECTIONS_PER_HOST
+        self.keepalive_expiry = keepalive_expiry or settings.HTTP_KEEPALIVE_EXPIRY
+        self.connect_timeout = connect_timeout or settings.HTTP_CONNECT_TIMEOUT
+        enable_http2 = settings.HTTP2_ENABLED if http2 is None else http2
+        self.http2 = enable_http2 and h2 is not None
+        if enable_http2 and h2 is None:
+            logger.info("h2 not installed, HTTP/2 disabled")
+
+        self.counters: Dict[str, Dict[str, float]] = {
+            "httpx": {"requests": 0, "connections": 0, "tls_handshakes": 0, "connect_ms": 0.0},
+            "aiohttp": {"requests": 0, "connections": 0, "reused": 0, "errors": 0, "connect_ms": 0.0},
+        }
+        self.client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(None, connect=self.connect_timeout),
+            event_hooks={"request": [self._on_httpx_request]},
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._public_session: Optional[aiohttp.ClientSession] = None
+
+    def _create_session(self, resolver: Optional[AbstractResolver] = None) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host,
+            keepalive_timeout=self.keepalive_expiry,
+            ttl_dns_cache=300,
+            resolver=resolver,
+        )
+        return aiohttp.ClientSession(connector=connector, trace_configs=[self._aiohttp_trace_config()])
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """aiohttp 会话在首次使用时创建，需要在事件循环中调用"""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    @property
+    def public_session(self) -> aiohttp.ClientSession:
+        """只连接公网地址的会话，用于抓取用户提交的URL"""
+        if self._public_session is None or self._public_session.closed:
+            self._public_session = self._create_session(PublicAddressResolver())
+        return self._public_session
+
+    def httpx_timeout(self, total: float) -> httpx.Timeout:
+        return httpx.Timeout(total, connect=self.connect_timeout)
+
+    def aiohttp_timeout(self, total: float) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=total, connect=self.connect_timeout)
+
+    async def _on_httpx_request(self, request: httpx.Request):
+        """通过 httpcore 的 trace 扩展统计新建连接和TLS握手耗时"""
+        counters = self.counters["httpx"]
+        counters["requests"] += 1
+        started = {}
+
+        async def trace(event_name: str, info: dict):
+            step, _, phase = event_name.rpartition(".")
+            if step not in ("connection.connect_tcp", "connection.start_tls"):
+                return
+            if phase == "started":
+                started[step] = time.perf_counter()
+            elif phase == "complete" and step in started:
+                counters["connect_ms"] += (time.perf_counter() - started.pop(step)) * 1000
+                counters["connections" if step == "connection.connect_tcp" else "tls_handshakes"] += 1
+
+        request.extensions["trace"] = trace
+
+    def _aiohttp_trace_config(self) -> aiohttp.TraceConfig:
+        counters = self.counters["aiohttp"]
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            counters["requests"] += 1
+
+        async def on_request_exception(session, ctx, params):
+            counters["errors"] += 1
+
+        async def on_connection_create_start(session, ctx, params):
+            ctx.connect_start = time.perf_counter()
+
+        async def on_connection_create_end(session, ctx, params):
+            counters["connections"] += 1
+            counters["connect_ms"] += (time.perf_counter() - ctx.connect_start) * 1000
+
+        async def on_connection_reuseconn(session, ctx, params):
+            counters["reused"] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    async def _warm_one(self, url: str, use_aiohttp: bool):
+        if use_aiohttp:
+            async with self.session.head(url, timeout=self.aiohttp_timeout(settings.HTTP_WARMUP_TIMEOUT)):
+                pass
+        else:
+            await self.client.head(url, timeout=self.httpx_timeout(settings.HTTP_WARMUP_TIMEOUT))
+
+    async def warm_up(self, url: str, connections: Optional[int] = None, use_aiohttp: bool = False) -> int:
+        """
+        预先建立到上游的连接（含TLS握手），连接留在池中供后续请求复用；返回成功建立的连接数
+        """
+        count = connections or settings.HTTP_WARMUP_CONNECTIONS
+        results = await asyncio.gather(
+            *[self._warm_one(url, use_aiohttp) for _ in range(count)],
+            return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            logger.warning("Connection warm-up to %s failed: %s", url, errors[0])
+        else:
+            logger.info("Warmed %d connections to %s", count, url)
+        return count - len(errors)
+
+    def _httpx_pool_stats(self) -> dict:
+        # httpcore 没有公开连接池统计，按内部属性读取，取不到时返回空
+        pool = getattr(getattr(self.client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+    def _aiohttp_pool_stats(self) -> dict:
+        idle = active = 0
+        for session in (self._session, self._public_session):
+            if session is None or session.closed:
+                continue
+            idle += sum(len(conns) for conns in getattr(session.connector, "_conns", {}).values())
+            active += len(getattr(session.connector, "_acquired", ()))
+        return {"open": idle + active, "idle": idle, "active": active}
+
+    def stats(self) -> dict:
+        return {
+            "limits": {
+                "max_connections": self.max_connections,
+                "max_keepalive_connections": self.max_keepalive_connections,
+                "max_connections_per_host": self.max_connections_per_host,
+                "keepalive_expiry": self.keepalive_expiry,
+                "http2": self.http2,
+            },
+            "httpx": {**self._httpx_pool_stats(), **self.counters["httpx"]},
+            "aiohttp": {**self._aiohttp_pool_stats(), **self.counters["aiohttp"]},
+        }
+
+    async def close(self):
+        await self.client.aclose()
+        for session in (self._session, self._public_session):
+            if session and not session.closed:
+                await session.close()
+        logger.info("HTTP transport closed")
@@ -1,21 +1,49 @@
+import queue
+import random
 import logging
 import sys
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from typing import Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from ..core.config import get_settings
 
 settings = get_settings()
 
+# 后台写日志的监听线程，setup_logging 只会创建一次
+_listeners = []
+
+def _start_queue_listener(*handlers: logging.Handler) -> QueueHandler:
+    """
+    日志记录只入队，由后台线程写入文件和控制台，请求路径不阻塞在磁盘IO上
+    """
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return QueueHandler(log_queue)
+
 def setup_logging():
     # 创建logs目录
-    log_dir = Path("logs")
+    log_dir = Path(settings.LOG_DIR)
     log_dir.mkdir(exist_ok=True)
-    
+
+    # 为主要组件创建日志记录器
+    loggers = {
+        'translator': logging.getLogger('translator'),
+        'api': logging.getLogger('api'),
+        'cache': logging.getLogger('cache')
+    }
+    for logger in loggers.values():
+        logger.setLevel(settings.LOG_LEVEL)
+
+    if _listeners:
+        return loggers
+
     # 配置日志格式
     log_format = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
-    
+
     # 创建日志处理器
     file_handler = RotatingFileHandler(
         log_dir / "app.log",
@@ -24,25 +52,45 @@ def setup_logging():
         encoding='utf-8'
     )
     file_handler.setFormatter(log_format)
-    
+
     # 控制台处理器
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(log_format)
-    
+
     # 配置根日志记录器
     root_logger = logging.getLogger()
     root_logger.setLevel(settings.LOG_LEVEL)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
-    
-    # 为主要组件创建日志记录器
-    loggers = {
-        'translator': logging.getLogger('translator'),
-        'api': logging.getLogger('api'),
-        'cache': logging.getLogger('cache')
-    }
-    
-    for logger in loggers.values():
-        logger.setLevel(settings.LOG_LEVEL)
-    
-    return loggers
\ No newline at end of file
+    root_logger.addHandler(_start_queue_listener(file_handler, console_handler))
+
+    # 请求追踪单独写入JSON行文件，不进入普通日志
+    trace_handler = RotatingFileHandler(
+        log_dir / "traces.jsonl",
+        maxBytes=50*1024*1024,  # 50MB
+        backupCount=3,
+        encoding='utf-8'
+    )
+    trace_handler.setFormatter(logging.Formatter('%(message)s'))
+    trace_logger = logging.getLogger('trace')
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.propagate = False
+    trace_logger.addHandler(_start_queue_listener(trace_handler))
+
+    return loggers
+
+def shutdown_logging():
+    """停止后台线程，写完队列中剩余的日志"""
+    while _listeners:
+        _listeners.pop().stop()
+
+def log_payload(logger: logging.Logger, label: str, text: Optional[str], level: int = logging.DEBUG):
+    """
+    按采样率记录请求或译文内容，并截断到固定长度
+    """
+    if text is None or not logger.isEnabledFor(level):
+        return
+    if random.random() >= settings.LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    max_chars = settings.LOG_PAYLOAD_MAX_CHARS
+    if len(text) > max_chars:
+        text = f"{text[:max_chars]}... ({len(text)} chars)"
+    logger.log(level, "%s: %s", label, text)
@@ -0,0 +1,91 @@
+import json
+import time
+import uuid
+import random
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+from ..core.config import get_settings
+
+settings = get_settings()
+trace_logger = logging.getLogger('trace')
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """
+    单个请求的追踪记录，子任务通过 contextvars 共享同一个 Trace
+    """
+
+    def __init__(self, trace_id: Optional[str] = None, name: str = "request"):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.name = name
+        self.start = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: List[dict] = []
+        self.attrs: dict = {}
+
+    def add_span(self, name: str, start: float, end: float, attrs: dict):
+        self.spans.append({
+            "name": name,
+            "start_ms": round((start - self.start) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3),
+            **attrs,
+        })
+
+    @property
+    def duration_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "timestamp": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            **self.attrs,
+            "spans": sorted(self.spans, key=lambda span: span["start_ms"]),
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def start_trace(trace_id: Optional[str] = None, name: str = "request") -> Trace:
+    trace = Trace(trace_id, name)
+    _current_trace.set(trace)
+    return trace
+
+
+def finish_trace(trace: Trace):
+    """
+    按采样率导出追踪记录，慢请求始终导出
+    """
+    _current_trace.set(None)
+    if not settings.TRACE_ENABLED:
+        return
+    if trace.duration_ms < settings.TRACE_SLOW_MS and random.random() >= settings.TRACE_SAMPLE_RATE:
+        return
+    trace_logger.info(json.dumps(trace.to_dict(), ensure_ascii=False))
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    记录一段耗时，没有进行中的追踪时不做任何事
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield attrs
+        return
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        trace.add_span(name, start, time.perf_counter(), attrs)
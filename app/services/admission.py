@@ -0,0 +1,221 @@
+import math
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from ..core.config import get_settings
+from ..core.tracing import span
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+# 租户令牌桶数量上限，超过时淘汰最久未使用的桶
+MAX_IDLE_BUCKETS = 10000
+
+
+class AdmissionRejected(Exception):
+    """请求被准入控制拒绝，携带HTTP状态码和建议的重试时间"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_consume(self, amount: float) -> float:
+        """
+        尝试扣减令牌，成功返回0，否则返回需要等待的秒数。
+        超过桶容量的大请求在桶满时放行并扣成负数，租户之后要等欠下的令牌补回才能继续
+        """
+        self._refill(time.monotonic())
+        needed = min(amount, self.capacity)
+        if self.tokens >= needed:
+            self.tokens -= amount
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return (needed - self.tokens) / self.rate
+
+    def refund(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdmissionController:
+    """
+    翻译请求准入控制：按租户令牌桶限额，按优先级排队，
+    预计等待时间超过请求截止时间时立即拒绝
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        bulk_max_queue: Optional[int] = None,
+        tokens_per_second: Optional[float] = None,
+        token_burst: Optional[float] = None,
+        enabled: Optional[bool] = None,
+    ):
+        self.enabled = settings.ADMISSION_ENABLED if enabled is None else enabled
+        self.max_concurrent = max_concurrent or settings.ADMISSION_MAX_CONCURRENT
+        self.queue_limits = {
+            PRIORITY_INTERACTIVE: settings.ADMISSION_MAX_QUEUE if max_queue is None else max_queue,
+            PRIORITY_BULK: settings.ADMISSION_BULK_MAX_QUEUE if bulk_max_queue is None else bulk_max_queue,
+        }
+        self.tokens_per_second = tokens_per_second or settings.TENANT_TOKENS_PER_SECOND
+        self.token_burst = token_burst or settings.TENANT_TOKEN_BURST
+
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._waiters = {p: deque() for p in PRIORITIES}
+        self._queued_tokens = {p: 0 for p in PRIORITIES}
+        self._inflight = 0
+        self._inflight_tokens = 0
+        # 每个token的平均处理耗时（秒），由已完成请求滑动平均得到
+        self._seconds_per_token = 0.005
+        self.rejected = {429: 0, 503: 0}
+
+    def _get_bucket(self, tenant: str) -> TokenBucket:
+        bucket = self._buckets.get(tenant)
+        if bucket is None:
+            bucket = TokenBucket(self.tokens_per_second, self.token_burst)
+            self._buckets[tenant] = bucket
+            while len(self._buckets) > MAX_IDLE_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(tenant)
+        return bucket
+
+    def estimate_wait(self, priority: str, tokens: int) -> float:
+        """
+        估算请求在队列中的等待时间（秒）
+        """
+        ahead = self._queued_tokens[PRIORITY_INTERACTIVE]
+        if priority == PRIORITY_BULK:
+            ahead += self._queued_tokens[PRIORITY_BULK]
+        if self._inflight < self.max_concurrent and ahead == 0:
+            return 0.0
+        return (ahead + self._inflight_tokens) * self._seconds_per_token / self.max_concurrent
+
+    def _reject(self, status_code: int, detail: str, retry_after: float):
+        self.rejected[status_code] += 1
+        logger.warning("Admission rejected (%s): %s", status_code, detail)
+        raise AdmissionRejected(status_code, detail, retry_after)
+
+    async def acquire(self, tenant: str, priority: str, tokens: int, deadline: float):
+        if priority not in PRIORITIES:
+            priority = PRIORITY_INTERACTIVE
+
+        bucket = self._get_bucket(tenant)
+        quota_wait = bucket.try_consume(tokens)
+        if quota_wait > 0:
+            self._reject(429, "Tenant token quota exceeded", quota_wait)
+
+        # 有空闲槽位且没有同级或更高优先级的请求在排队，直接放行
+        blocked = self._waiters[PRIORITY_INTERACTIVE] or (
+            priority == PRIORITY_BULK and self._waiters[PRIORITY_BULK]
+        )
+        if self._inflight < self.max_concurrent and not blocked:
+            self._inflight += 1
+            self._inflight_tokens += tokens
+            return
+
+        estimated_wait = self.estimate_wait(priority, tokens)
+        if len(self._waiters[priority]) >= self.queue_limits[priority]:
+            bucket.refund(tokens)
+            self._reject(503, f"Admission queue full for {priority} requests", estimated_wait)
+        if estimated_wait > deadline:
+            bucket.refund(tokens)
+            self._reject(503, "Estimated wait exceeds request deadline", estimated_wait)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append((future, tokens))
+        self._queued_tokens[priority] += tokens
+        try:
+            await asyncio.wait_for(future, timeout=deadline)
+        except asyncio.TimeoutError:
+            self._discard_waiter(priority, future, tokens)
+            bucket.refund(tokens)
+            self._reject(503, "Request deadline expired while queued", self.estimate_wait(priority, tokens))
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 槽位已转交但请求被取消，直接归还
+                self._inflight_tokens += tokens
+                self.release(tokens)
+            else:
+                self._discard_waiter(priority, future, tokens)
+            raise
+        # 槽位已由 release 转交给当前请求
+        self._inflight_tokens += tokens
+
+    def _discard_waiter(self, priority: str, future: asyncio.Future, tokens: int):
+        try:
+            self._waiters[priority].remove((future, tokens))
+            self._queued_tokens[priority] -= tokens
+        except ValueError:
+            pass
+
+    def release(self, tokens: int, elapsed: Optional[float] = None):
+        self._inflight_tokens -= tokens
+        if elapsed is not None and tokens > 0:
+            self._seconds_per_token = 0.8 * self._seconds_per_token + 0.2 * (elapsed / tokens)
+
+        for priority in PRIORITIES:
+            waiters = self._waiters[priority]
+            while waiters:
+                future, queued_tokens = waiters.popleft()
+                self._queued_tokens[priority] -= queued_tokens
+                if not future.done():
+                    future.set_result(None)
+                    return
+        self._inflight -= 1
+
+    @asynccontextmanager
+    async def admit(self, tenant: str, priority: str, tokens: int, deadline: Optional[float] = None):
+        """
+        获取执行槽位，退出时释放并更新处理速度估计
+        """
+        if not self.enabled:
+            yield
+            return
+
+        if deadline is None:
+            deadline = settings.ADMISSION_DEFAULT_DEADLINE
+        with span("admission", priority=priority, tokens=tokens):
+            await self.acquire(tenant, priority, tokens, deadline)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(tokens, time.monotonic() - start)
+
+    def stats(self) -> dict:
+        return {
+            "inflight": self._inflight,
+            "inflight_tokens": self._inflight_tokens,
+            "queued": {p: len(self._waiters[p]) for p in PRIORITIES},
+            "queued_tokens": dict(self._queued_tokens),
+            "seconds_per_token": self._seconds_per_token,
+            "rejected": dict(self.rejected),
+            "tenants": len(self._buckets),
+        }
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BatcherClosedError(RuntimeError):
+    """批处理器已关闭，排队中的请求不会再执行"""
+
+
+class DynamicBatcher:
+    """
+    动态批处理：把并发提交的文本合并成一次推理调用，推理放在线程池中执行
+
+    收集批次时最多等待 max_wait 秒；推理槽位都被占用时继续排队，下一批会更大。
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[str]], List[str]],
+        executor: Executor,
+        max_batch_size: int = 16,
+        max_wait: float = 0.01,
+        max_inflight_batches: int = 1,
+    ):
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._slots = asyncio.Semaphore(max_inflight_batches)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # 正在收集、尚未交给推理的批次
+        self._collecting: List[Tuple[str, asyncio.Future]] = []
+        self._tasks = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, text: str) -> str:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._collect())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = self._collecting = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+            # 等待推理槽位期间到达的请求也并入本批
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            self._collecting = []
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        try:
+            batch = [(text, future) for text, future in batch if not future.cancelled()]
+            if not batch:
+                return
+            self.batches += 1
+            self.items += len(batch)
+            texts = [text for text, _ in batch]
+            loop = asyncio.get_running_loop()
+            try:
+                results = await loop.run_in_executor(self.executor, self.batch_fn, texts)
+                if len(results) != len(texts):
+                    raise RuntimeError(f"Batch returned {len(results)} results for {len(texts)} inputs")
+            except Exception as e:
+                logger.error(f"Batch inference failed: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        """
+        停止收集新批次，已开始的推理执行完毕；排队中和正在收集的请求收到 BatcherClosedError
+        """
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        pending = self._collecting
+        self._collecting = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(BatcherClosedError("Batcher closed"))
+        for task in list(self._tasks):
+            await task
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0,
+            "queued": self._queue.qsize() if self._queue else 0,
+        }
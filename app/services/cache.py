@@ -1,14 +1,29 @@
 import json
+import shutil
+import logging
 from pathlib import Path
 from hashlib import md5
+from typing import Optional
 from ..core.config import get_settings
+from .snapshot import CacheSnapshot, SnapshotError
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 class TranslationCache:
-    def __init__(self):
-        self.cache_dir = Path(settings.CACHE_DIR)
+    def __init__(self, cache_dir: Optional[str] = None, snapshot_path: Optional[str] = None):
+        self.cache_dir = Path(cache_dir or settings.CACHE_DIR)
         self.cache_dir.mkdir(exist_ok=True)
+
+        # 只读快照层，可写的缓存目录叠加在其上
+        self.snapshot = None
+        snapshot_path = settings.CACHE_SNAPSHOT_PATH if snapshot_path is None else snapshot_path
+        if snapshot_path and Path(snapshot_path).exists():
+            try:
+                self.snapshot = CacheSnapshot(snapshot_path)
+                logger.info("Loaded cache snapshot %s (%d entries)", snapshot_path, len(self.snapshot))
+            except SnapshotError as e:
+                logger.error("Failed to load cache snapshot: %s", e)
     
     def _get_cache_key(self, text: str) -> str:
         return md5(text.encode()).hexdigest()
@@ -23,6 +38,8 @@ class TranslationCache:
         if cache_file.exists():
             with cache_file.open('r', encoding='utf-8') as f:
                 return json.load(f)['translation']
+        if self.snapshot:
+            return self.snapshot.get(cache_key)
         return None
     
     def set(self, text: str, translation: str):
@@ -37,8 +54,32 @@ class TranslationCache:
                 'original': text,
                 'translation': translation
             }, f, ensure_ascii=False, indent=2)
+        # 译文变化后旧的响应体失效
+        (self.cache_dir / f"{cache_key}.resp").unlink(missing_ok=True)
+
+    def get_response(self, text: str) -> Optional[bytes]:
+        """
+        返回预编码的响应体，命中时直接读字节，不需要解析记录再序列化
+        """
+        if not settings.CACHE_ENABLED:
+            return None
+        try:
+            return (self.cache_dir / f"{self._get_cache_key(text)}.resp").read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def set_response(self, text: str, body: bytes):
+        """保存编码后的响应体；快照层命中的结果也写入，之后按字节直接返回"""
+        if not settings.CACHE_ENABLED:
+            return
+        cache_key = self._get_cache_key(text)
+        tmp_file = self.cache_dir / f"{cache_key}.resp.tmp"
+        tmp_file.write_bytes(body)
+        tmp_file.replace(self.cache_dir / f"{cache_key}.resp")
 
     def clear(self):
-        """清除所有缓存文件"""
-        for cache_file in self.cache_dir.glob('*.json'):
-            cache_file.unlink()
\ No newline at end of file
+        """清除所有缓存文件和术语表缓存（快照层为只读，不受影响）"""
+        for pattern in ('*.json', '*.resp'):
+            for cache_file in self.cache_dir.glob(pattern):
+                cache_file.unlink()
+        shutil.rmtree(self.cache_dir / 'glossary', ignore_errors=True)
\ No newline at end of file
@@ -0,0 +1,215 @@
+import codecs
+import asyncio
+import logging
+import ipaddress
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import aiohttp
+import trafilatura
+
+from ..core.config import get_settings
+from ..core.tracing import span
+from ..core.http import BlockedAddressError, HttpTransport, is_public_address
+from ..utils.text import TextProcessor
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class FetchError(Exception):
+    """页面抓取或正文提取失败"""
+
+    def __init__(self, url: str, message: str, status_code: int = 502):
+        super().__init__(f"{url}: {message}")
+        self.url = url
+        self.status_code = status_code
+
+
+def decode_body(body: bytes, charset: Optional[str]) -> str:
+    """按响应声明的编码解码，编码未知时按 UTF-8 解码"""
+    try:
+        codecs.lookup(charset or "utf-8")
+    except LookupError:
+        logger.info("Unknown charset %r, decoding as utf-8", charset)
+        charset = "utf-8"
+    return body.decode(charset or "utf-8", errors="replace")
+
+
+def extract_main_text(html: str, url: Optional[str] = None) -> str:
+    """
+    提取网页正文，段落之间用空行分隔；提取失败时退回到整页文本
+    """
+    text = trafilatura.extract(html, url=url, include_comments=False, include_tables=True)
+    if not text:
+        text = TextProcessor.clean_html(html)
+    return '\n\n'.join(TextProcessor.extract_paragraphs(text.replace('\n', '\n\n')))
+
+
+class PageFetcher:
+    """
+    通过共享连接池抓取网页，支持条件请求，正文提取放在线程池中执行。
+    默认只连接公网地址，重定向逐跳检查，避免服务被用来访问内网
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        extract_workers: Optional[int] = None,
+        max_cached_pages: Optional[int] = None,
+        transport: Optional[HttpTransport] = None,
+        allow_private_networks: Optional[bool] = None,
+    ):
+        self.max_connections = max_connections or settings.FETCH_MAX_CONNECTIONS
+        self.timeout = timeout or settings.FETCH_TIMEOUT
+        self.max_bytes = max_bytes or settings.FETCH_MAX_BYTES
+        self.max_cached_pages = max_cached_pages or settings.FETCH_CACHED_PAGES
+        self.allow_private_networks = (
+            settings.FETCH_ALLOW_PRIVATE_NETWORKS if allow_private_networks is None else allow_private_networks
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=extract_workers or settings.EXTRACT_WORKERS,
+            thread_name_prefix="extract",
+        )
+        # url -> (ETag, Last-Modified, 正文)
+        self._pages: "OrderedDict[str, Tuple[Optional[str], Optional[str], str]]" = OrderedDict()
+        # 连接池未传入时由抓取器自己创建和关闭
+        self._owns_transport = transport is None
+        self.transport = transport or HttpTransport()
+        # 连接池由各上游共享，这里限制同时抓取的页面数，避免占满连接
+        self._slots = asyncio.Semaphore(self.max_connections)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self.allow_private_networks:
+            return self.transport.session
+        return self.transport.public_session
+
+    async def initialize(self):
+        # 提前创建共享会话
+        self.session
+
+    def _check_url(self, url: str):
+        """检查协议和主机；域名解析出的地址由连接池的解析器检查"""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise FetchError(url, "Only http(s) URLs are supported", status_code=400)
+        if not parts.hostname:
+            raise FetchError(url, "Missing host", status_code=400)
+        if self.allow_private_networks:
+            return
+        try:
+            ipaddress.ip_address(parts.hostname)
+        except ValueError:
+            return
+        if not is_public_address(parts.hostname):
+            raise FetchError(url, "Refusing to fetch a non-public address", status_code=403)
+
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        headers = {}
+        cached = self._pages.get(url)
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def _remember(self, url: str, etag: Optional[str], last_modified: Optional[str], text: str):
+        if not etag and not last_modified:
+            # 没有校验信息无法做条件请求，不缓存
+            self._pages.pop(url, None)
+            return
+        self._pages[url] = (etag, last_modified, text)
+        self._pages.move_to_end(url)
+        while len(self._pages) > self.max_cached_pages:
+            self._pages.popitem(last=False)
+
+    async def fetch_text(self, url: str) -> str:
+        """
+        抓取页面并返回正文，页面未变化时直接使用缓存的正文
+        """
+        self._check_url(url)
+        try:
+            with span("fetch") as attrs:
+                async with self._slots:
+                    html, etag, last_modified = await self._download(url, attrs)
+        except aiohttp.ClientConnectorError as e:
+            if isinstance(e.os_error, BlockedAddressError):
+                raise FetchError(url, "Refusing to fetch a non-public address", status_code=403)
+            raise FetchError(url, f"HTTP error: {str(e)}")
+        except aiohttp.ClientError as e:
+            raise FetchError(url, f"HTTP error: {str(e)}")
+        except asyncio.TimeoutError:
+            raise FetchError(url, "Timed out", status_code=504)
+        if html is None:
+            return self._pages[url][2]
+
+        loop = asyncio.get_running_loop()
+        with span("extract"):
+            text = await loop.run_in_executor(self._executor, extract_main_text, html, url)
+        if not text:
+            raise FetchError(url, "No text content found", status_code=422)
+
+        self._remember(url, etag, last_modified, text)
+        return text
+
+    async def _download(self, url: str, attrs: dict) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """
+        下载页面，返回 (HTML, ETag, Last-Modified)；页面未变化时HTML为None。
+        重定向手动跟随，每一跳的目标都重新检查
+        """
+        target = url
+        headers = self._conditional_headers(url)
+        for _ in range(settings.FETCH_MAX_REDIRECTS + 1):
+            async with self.session.get(
+                target,
+                headers=headers,
+                allow_redirects=False,
+                timeout=self.transport.aiohttp_timeout(self.timeout),
+            ) as response:
+                location = response.headers.get("Location")
+                if response.status in (301, 302, 303, 307, 308) and location:
+                    target = urljoin(target, location)
+                    self._check_url(target)
+                    # 条件请求头只对原始URL有效
+                    headers = {}
+                    continue
+                return await self._read_page(url, response, attrs)
+        raise FetchError(url, "Too many redirects")
+
+    async def _read_page(
+        self, url: str, response: aiohttp.ClientResponse, attrs: dict
+    ) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        attrs["status"] = response.status
+        if response.status == 304 and url in self._pages:
+            logger.info("Page not modified: %s", url)
+            self._pages.move_to_end(url)
+            return None, None, None
+        if response.status != 200:
+            raise FetchError(url, f"Upstream returned HTTP {response.status}")
+        if response.content_length and response.content_length > self.max_bytes:
+            raise FetchError(url, "Page too large", status_code=413)
+
+        # content.read(n) 只返回已缓冲的数据，需要读到结束为止
+        chunks, size = [], 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise FetchError(url, "Page too large", status_code=413)
+            chunks.append(chunk)
+        body = b"".join(chunks)
+        attrs["bytes"] = size
+        html = decode_body(body, response.charset)
+        return html, response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+    async def close(self):
+        if self._owns_transport:
+            await self.transport.close()
+        self._executor.shutdown(wait=False)
+        logger.info("Page fetcher closed")
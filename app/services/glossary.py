@@ -0,0 +1,114 @@
+import re
+import json
+import logging
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# 多词专有名词（Machine Learning、New York）
+PHRASE_PATTERN = re.compile(r"\b[A-Z][a-z]+(?:[ -](?:of |the |and )?[A-Z][a-z]+)+\b")
+# 缩写和驼峰词（API、GPUs、TensorFlow、iPhone）
+TOKEN_PATTERN = re.compile(r"\b(?:[A-Z]{2,}s?|[A-Za-z][a-z]+[A-Z][A-Za-z]*)\b")
+# 句中的大写单词，多为人名、地名或产品名
+NAME_PATTERN = re.compile(r"\b[A-Z][a-z]{2,}\b")
+
+GLOSSARY_INSTRUCTION = "Use the following translations for these terms consistently:"
+
+
+def _find_terms(text: str):
+    """返回 (术语列表, 句首大写单词列表)"""
+    terms = PHRASE_PATTERN.findall(text)
+    # 已匹配的短语不再拆成单词
+    masked = PHRASE_PATTERN.sub(lambda m: " " * len(m.group()), text)
+    terms.extend(TOKEN_PATTERN.findall(masked))
+    initials = []
+    for match in NAME_PATTERN.finditer(masked):
+        before = masked[:match.start()].rstrip()
+        if before and before[-1] not in '.!?:"\'\n':
+            terms.append(match.group())
+        else:
+            initials.append(match.group())
+    return terms, initials
+
+
+def extract_terms(chunks: List[str], max_terms: Optional[int] = None) -> List[str]:
+    """
+    提取在多个块中出现的关键术语，按出现的块数和次数排序；
+    只出现在一个块里的术语由同一次调用翻译，不会前后不一致
+    """
+    max_terms = max_terms or settings.GLOSSARY_MAX_TERMS
+    found = [_find_terms(chunk) for chunk in chunks]
+    # 句首的大写单词只有在别处出现在句中时才算作专有名词
+    known = {term for terms, _ in found for term in terms}
+    chunk_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    for terms, initials in found:
+        terms = terms + [word for word in initials if word in known]
+        total_counts.update(terms)
+        chunk_counts.update(set(terms))
+    candidates = [term for term, count in chunk_counts.items() if count >= 2]
+    candidates.sort(key=lambda term: (-chunk_counts[term], -total_counts[term], term))
+    return candidates[:max_terms]
+
+
+def relevant_entries(glossary: Optional[Dict[str, str]], text: str) -> Dict[str, str]:
+    """只保留在当前块中出现的术语，控制提示长度"""
+    if not glossary:
+        return {}
+    return {term: translation for term, translation in glossary.items() if term in text}
+
+
+def format_glossary(glossary: Dict[str, str]) -> str:
+    lines = '\n'.join(f"{term} => {translation}" for term, translation in glossary.items())
+    return f"{GLOSSARY_INSTRUCTION}\n{lines}"
+
+
+class GlossaryCache:
+    """
+    按文档哈希缓存术语表：内存中保留最近的文档，开启缓存时同时写入磁盘
+    """
+
+    def __init__(self, max_documents: Optional[int] = None, cache_dir: Optional[str] = None):
+        self.max_documents = max_documents or settings.GLOSSARY_CACHED_DOCUMENTS
+        self.cache_dir = Path(cache_dir or settings.CACHE_DIR) / "glossary"
+        self._documents: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+
+    def get(self, doc_hash: str) -> Optional[Dict[str, str]]:
+        glossary = self._documents.get(doc_hash)
+        if glossary is not None:
+            self._documents.move_to_end(doc_hash)
+            return glossary
+        if not settings.CACHE_ENABLED:
+            return None
+        cache_file = self.cache_dir / f"{doc_hash}.json"
+        if not cache_file.exists():
+            return None
+        try:
+            with cache_file.open('r', encoding='utf-8') as f:
+                glossary = json.load(f)
+            if not isinstance(glossary, dict):
+                raise ValueError("glossary is not an object")
+        except (OSError, ValueError) as e:
+            # 文件损坏时按未命中处理，重新生成的术语表会覆盖它
+            logger.warning("Ignoring corrupt glossary cache %s: %s", cache_file, e)
+            return None
+        self._remember(doc_hash, glossary)
+        return glossary
+
+    def set(self, doc_hash: str, glossary: Dict[str, str]):
+        self._remember(doc_hash, glossary)
+        if not settings.CACHE_ENABLED:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with (self.cache_dir / f"{doc_hash}.json").open('w', encoding='utf-8') as f:
+            json.dump(glossary, f, ensure_ascii=False, indent=2)
+
+    def _remember(self, doc_hash: str, glossary: Dict[str, str]):
+        self._documents[doc_hash] = glossary
+        self._documents.move_to_end(doc_hash)
+        while len(self._documents) > self.max_documents:
+            self._documents.popitem(last=False)
@@ -0,0 +1,186 @@
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class SpaceSavingTracker:
+    """
+    Space-Saving 算法统计高频key，只保留固定数量的计数器。
+    计数器按计数分桶（stream-summary），替换最小计数的key不需要遍历全部计数器
+    """
+
+    def __init__(self, capacity: int, decay_window: int = 0):
+        self.capacity = capacity
+        self.decay_window = decay_window
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        # 计数 -> 该计数下的key（dict 保持插入顺序，用作有序集合）
+        self._buckets: Dict[int, Dict[str, None]] = {}
+        self._min_count = 0
+        self.total = 0
+        self._since_decay = 0
+
+    def _add(self, key: str, count: int):
+        self.counts[key] = count
+        self._buckets.setdefault(count, {})[key] = None
+
+    def _remove(self, key: str) -> int:
+        count = self.counts.pop(key)
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+            if count == self._min_count:
+                # 最小桶清空时，被移走的key总是进入 count+1 的桶
+                self._min_count = count + 1
+        return count
+
+    def record(self, key: str) -> int:
+        """
+        记录一次访问，返回该key的保证计数（计数减去误差上界）
+        """
+        self.total += 1
+        if key in self.counts:
+            self._add(key, self._remove(key) + 1)
+        elif len(self.counts) < self.capacity:
+            self._add(key, 1)
+            self.errors[key] = 0
+            self._min_count = 1
+        else:
+            # 替换计数最小的key，新key继承其计数作为误差
+            victim = next(iter(self._buckets[self._min_count]))
+            min_count = self._remove(victim)
+            self.errors.pop(victim)
+            self._add(key, min_count + 1)
+            self.errors[key] = min_count
+
+        self._since_decay += 1
+        if self.decay_window and self._since_decay >= self.decay_window:
+            self._decay()
+        return self.guaranteed(key)
+
+    def guaranteed(self, key: str) -> int:
+        if key not in self.counts:
+            return 0
+        return self.counts[key] - self.errors[key]
+
+    def _decay(self):
+        """计数减半，让热点随流量变化"""
+        self._since_decay = 0
+        for key in list(self.counts):
+            self.counts[key] //= 2
+            self.errors[key] //= 2
+            if self.counts[key] == 0:
+                del self.counts[key]
+                del self.errors[key]
+        self._buckets = {}
+        for key, count in self.counts.items():
+            self._buckets.setdefault(count, {})[key] = None
+        self._min_count = min(self._buckets, default=0)
+
+    def top(self, n: int = 20) -> List[dict]:
+        keys = sorted(self.counts, key=self.counts.__getitem__, reverse=True)[:n]
+        return [
+            {"key": k, "count": self.counts[k], "error": self.errors[k]}
+            for k in keys
+        ]
+
+
+def _sizeof(value: Any) -> int:
+    """
+    常驻值占用的字节数：PreparedResponse 计入已生成的压缩版本，
+    字符串按UTF-8长度计算，段落列表按各段之和计算
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return nbytes
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (list, tuple)):
+        return sum(_sizeof(item) for item in value if item is not None)
+    return len(value)
+
+
+class HotKeyCache:
+    """
+    热点key识别 + 常驻内存层，命中时无需读磁盘或重新序列化。
+    常驻层同时按条目数和字节数限制，超出时淘汰最久未访问的key
+    """
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        min_hits: Optional[int] = None,
+        max_pinned: Optional[int] = None,
+        decay_window: Optional[int] = None,
+        max_pinned_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = _sizeof,
+    ):
+        self.tracker = SpaceSavingTracker(
+            capacity or settings.HOT_KEY_TRACKER_CAPACITY,
+            settings.HOT_KEY_DECAY_WINDOW if decay_window is None else decay_window,
+        )
+        self.min_hits = min_hits or settings.HOT_KEY_MIN_HITS
+        self.max_pinned = max_pinned or settings.HOT_KEY_MAX_PINNED
+        self.max_pinned_bytes = max_pinned_bytes or settings.HOT_KEY_MAX_PINNED_BYTES
+        self.sizeof = sizeof
+        self.pinned: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self.pinned_bytes = 0
+        self.hits = 0
+
+    def record(self, key: str) -> bool:
+        """
+        记录一次访问，返回该key是否为热点
+        """
+        return self.tracker.record(key) >= self.min_hits
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.pinned.get(key)
+        if value is not None:
+            self.pinned.move_to_end(key)
+            self.hits += 1
+        return value
+
+    def pin(self, key: str, value: Any):
+        """
+        固定key，已固定的key重新计算占用（压缩版本在固定之后才生成）
+        """
+        self._unpin(key)
+        size = self.sizeof(value)
+        if size > self.max_pinned_bytes:
+            return
+        self.pinned[key] = value
+        self._sizes[key] = size
+        self.pinned_bytes += size
+        while len(self.pinned) > self.max_pinned or self.pinned_bytes > self.max_pinned_bytes:
+            evicted = next(iter(self.pinned))
+            self._unpin(evicted)
+            logger.debug("Unpinned hot key %s", evicted)
+
+    def _unpin(self, key: str):
+        if self.pinned.pop(key, None) is not None:
+            self.pinned_bytes -= self._sizes.pop(key)
+
+    def clear(self):
+        self.pinned.clear()
+        self._sizes.clear()
+        self.pinned_bytes = 0
+
+    def stats(self, top_n: int = 20) -> dict:
+        return {
+            "total": self.tracker.total,
+            "tracked": len(self.tracker.counts),
+            "pinned": len(self.pinned),
+            "pinned_bytes": self.pinned_bytes,
+            "pinned_hits": self.hits,
+            "min_hits": self.min_hits,
+            "top": [
+                dict(item, pinned=item["key"] in self.pinned)
+                for item in self.tracker.top(top_n)
+            ],
+        }
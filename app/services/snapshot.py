@@ -0,0 +1,265 @@
+"""
+翻译缓存快照：用于在节点之间迁移缓存，新节点启动时直接加载
+
+文件格式（小端序）：
+    header  MAGIC(8) + 条目数 uint64
+    index   条目数 × (md5摘要 16字节 + 偏移 uint64 + 长度 uint32)，按摘要排序
+    data    每条缓存记录的 zlib 压缩 JSON
+
+索引定长且有序，打开时只做 mmap，查找时二分，不会把整个快照解析成 Python 对象。
+"""
+import os
+import json
+import mmap
+import zlib
+import heapq
+import struct
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BTSNAP01"
+HEADER = struct.Struct("<8sQ")
+INDEX_ENTRY = struct.Struct("<16sQI")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class CacheSnapshot:
+    """只读快照，通过 mmap 按需读取"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._mm = None
+        self._file = self.path.open("rb")
+        try:
+            self._open(path)
+        except BaseException:
+            self.close()
+            raise
+
+    def _open(self, path: str):
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise SnapshotError(f"Empty snapshot file: {path}")
+        if len(self._mm) < HEADER.size:
+            raise SnapshotError(f"Truncated snapshot file: {path}")
+
+        magic, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"Invalid snapshot file: {path}")
+        self._data_start = HEADER.size + self.count * INDEX_ENTRY.size
+        if len(self._mm) < self._data_start:
+            raise SnapshotError(f"Truncated snapshot file: {path}")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _entry(self, i: int) -> Tuple[bytes, int, int]:
+        digest, offset, length = INDEX_ENTRY.unpack_from(self._mm, HEADER.size + i * INDEX_ENTRY.size)
+        # 索引损坏时偏移可能指向索引区或文件之外，切片不会报错，这里显式检查
+        if offset < self._data_start or offset + length > len(self._mm):
+            raise SnapshotError(f"Corrupt index entry {i} in snapshot file: {self.path}")
+        return digest, offset, length
+
+    def _find(self, digest: bytes) -> Optional[int]:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = HEADER.size + mid * INDEX_ENTRY.size
+            key = self._mm[start:start + 16]
+            if key < digest:
+                lo = mid + 1
+            elif key > digest:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def get_record(self, cache_key: str) -> Optional[dict]:
+        """
+        按缓存key（md5十六进制）查找记录
+        """
+        try:
+            digest = bytes.fromhex(cache_key)
+        except ValueError:
+            return None
+        i = self._find(digest)
+        if i is None:
+            return None
+        try:
+            _, offset, length = self._entry(i)
+            return json.loads(zlib.decompress(self._mm[offset:offset + length]))
+        except (SnapshotError, zlib.error, ValueError) as e:
+            # 单条记录损坏时按未命中处理，不影响其他记录
+            logger.warning("Skipping corrupt snapshot record %s: %s", cache_key, e)
+            return None
+
+    def get(self, cache_key: str) -> Optional[str]:
+        record = self.get_record(cache_key)
+        return record["translation"] if record else None
+
+    def iter_raw(self) -> Iterator[Tuple[bytes, bytes]]:
+        """按摘要顺序返回 (摘要, 压缩记录)"""
+        for i in range(self.count):
+            digest, offset, length = self._entry(i)
+            yield digest, self._mm[offset:offset + length]
+
+    def __iter__(self) -> Iterator[Tuple[str, dict]]:
+        for digest, blob in self.iter_raw():
+            yield digest.hex(), json.loads(zlib.decompress(blob))
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _write_raw(path: str, items: Iterable[Tuple[bytes, bytes]]):
+    """
+    写入 (摘要, 压缩记录)，数据先落到临时文件，排序索引后再拼接成快照
+    """
+    path = Path(path)
+    index = []
+    with tempfile.TemporaryFile(dir=path.parent) as data:
+        for digest, blob in items:
+            index.append((digest, data.tell(), len(blob)))
+            data.write(blob)
+
+        index.sort()
+        data_start = HEADER.size + len(index) * INDEX_ENTRY.size
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with tmp_path.open("wb") as out:
+            out.write(HEADER.pack(MAGIC, len(index)))
+            for digest, offset, length in index:
+                out.write(INDEX_ENTRY.pack(digest, data_start + offset, length))
+            data.seek(0)
+            shutil.copyfileobj(data, out)
+        os.replace(tmp_path, path)
+    return len(index)
+
+
+def _compress(record: dict) -> bytes:
+    return zlib.compress(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def write_snapshot(path: str, records: Iterable[Tuple[str, dict]]) -> int:
+    """
+    将 (缓存key, 记录) 写成快照，返回条目数
+    """
+    return _write_raw(path, ((bytes.fromhex(key), _compress(record)) for key, record in records))
+
+
+def _iter_cache_dir(cache_dir: str) -> Iterator[Tuple[str, dict]]:
+    for cache_file in Path(cache_dir).glob("*.json"):
+        try:
+            with cache_file.open("r", encoding="utf-8") as f:
+                record = json.load(f)
+            bytes.fromhex(cache_file.stem)
+        except (ValueError, OSError) as e:
+            logger.warning("Skipping cache file %s: %s", cache_file, e)
+            continue
+        yield cache_file.stem, record
+
+
+def export_cache(cache_dir: str, path: str) -> int:
+    """导出缓存目录为快照"""
+    count = write_snapshot(path, _iter_cache_dir(cache_dir))
+    logger.info("Exported %d cache entries to %s", count, path)
+    return count
+
+
+def import_snapshot(path: str, cache_dir: str, overwrite: bool = False) -> int:
+    """将快照展开到缓存目录"""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(exist_ok=True)
+    count = 0
+    with CacheSnapshot(path) as snapshot:
+        for key, record in snapshot:
+            cache_file = cache_dir / f"{key}.json"
+            if cache_file.exists() and not overwrite:
+                continue
+            with cache_file.open("w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False, indent=2)
+            count += 1
+    logger.info("Imported %d cache entries from %s", count, path)
+    return count
+
+
+def _tagged(snapshot: CacheSnapshot, tag: int) -> Iterator[Tuple[bytes, int, bytes]]:
+    for digest, blob in snapshot.iter_raw():
+        yield digest, tag, blob
+
+
+def _dedupe_sorted(items: Iterable[Tuple[bytes, int, bytes]]) -> Iterator[Tuple[bytes, bytes]]:
+    previous = None
+    for digest, _, blob in items:
+        if digest != previous:
+            previous = digest
+            yield digest, blob
+
+
+def merge_snapshots(paths: List[str], output: str) -> int:
+    """
+    合并多个快照，key 重复时以后面的快照为准；各快照已排序，直接多路归并，不解压记录
+    """
+    snapshots = [CacheSnapshot(p) for p in paths]
+    try:
+        streams = [_tagged(snapshot, -priority) for priority, snapshot in enumerate(snapshots)]
+        count = _write_raw(output, _dedupe_sorted(heapq.merge(*streams, key=lambda item: item[:2])))
+    finally:
+        for snapshot in snapshots:
+            snapshot.close()
+    logger.info("Merged %d snapshots into %s (%d entries)", len(paths), output, count)
+    return count
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Translation cache snapshot tool")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="export cache directory to a snapshot")
+    export_parser.add_argument("output")
+    export_parser.add_argument("--cache-dir", default=None)
+
+    import_parser = subparsers.add_parser("import", help="unpack a snapshot into the cache directory")
+    import_parser.add_argument("snapshot")
+    import_parser.add_argument("--cache-dir", default=None)
+    import_parser.add_argument("--overwrite", action="store_true")
+
+    merge_parser = subparsers.add_parser("merge", help="merge snapshots, later ones win")
+    merge_parser.add_argument("output")
+    merge_parser.add_argument("snapshots", nargs="+")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command in ("export", "import") and args.cache_dir is None:
+        from ..core.config import get_settings
+        args.cache_dir = get_settings().CACHE_DIR
+
+    if args.command == "export":
+        export_cache(args.cache_dir, args.output)
+    elif args.command == "import":
+        import_snapshot(args.snapshot, args.cache_dir, args.overwrite)
+    else:
+        merge_snapshots(args.snapshots, args.output)
+
+
+if __name__ == "__main__":
+    main()
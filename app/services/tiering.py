@@ -0,0 +1,215 @@
+import re
+import math
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from ..core.config import get_settings
+from ..utils.text import TextProcessor
+
+settings = get_settings()
+
+TIER_FAST = "fast"
+TIER_STANDARD = "standard"
+TIER_LARGE = "large"
+# 本地模型处理的调用单独统计
+TIER_LOCAL = "local"
+TIER_ORDER = [TIER_FAST, TIER_STANDARD, TIER_LARGE]
+
+CONTENT_LABEL = "label"
+CONTENT_PROSE = "prose"
+CONTENT_CODE = "code"
+
+WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z'-]*")
+SYMBOL_PATTERN = re.compile(r"[{}<>\[\]=;_/\\|`$#@%^*+~]")
+SENTENCE_END_PATTERN = re.compile(r"[.!?。！？:：]\s*$")
+
+# 每个编号段落在输出中的额外开销（编号标记或JSON键）
+SEGMENT_OVERHEAD_TOKENS = 8
+
+
+def estimate_complexity(text: str) -> float:
+    """
+    粗略估算文本复杂度（0~1）：长词和符号越多、句子越长越复杂
+    """
+    words = WORD_PATTERN.findall(text)
+    if not words:
+        return 0.0
+    long_word_ratio = sum(1 for word in words if len(word) >= 10) / len(words)
+    symbol_ratio = len(SYMBOL_PATTERN.findall(text)) / len(text)
+    sentences = max(1, len(re.findall(r"[.!?](\s|$)", text)))
+    score = 2 * long_word_ratio + 4 * symbol_ratio
+    if len(words) / sentences > 25:
+        score += 0.2
+    return min(1.0, score)
+
+
+def detect_content_type(segments: List[str]) -> str:
+    """区分界面短标签、代码/标记和普通正文"""
+    text = '\n\n'.join(segments)
+    if "```" in text or len(SYMBOL_PATTERN.findall(text)) / max(1, len(text)) > 0.08:
+        return CONTENT_CODE
+    if all(len(WORD_PATTERN.findall(segment)) <= 6 and not SENTENCE_END_PATTERN.search(segment) for segment in segments):
+        return CONTENT_LABEL
+    return CONTENT_PROSE
+
+
+class TierChoice:
+    """
+    单次调用的档位选择：模型、文心接口地址和输出token上限
+    """
+
+    __slots__ = ("name", "model", "api_url", "max_tokens", "input_tokens", "content_type", "complexity")
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        api_url: str = "",
+        max_tokens: Optional[int] = None,
+        input_tokens: int = 0,
+        content_type: str = CONTENT_PROSE,
+        complexity: float = 0.0,
+    ):
+        self.name = name
+        self.model = model
+        self.api_url = api_url
+        self.max_tokens = max_tokens
+        self.input_tokens = input_tokens
+        self.content_type = content_type
+        self.complexity = complexity
+
+
+class TierPolicy:
+    """
+    按块的长度、复杂度和内容类型选择模型档位，并按预估译文长度设置 max_tokens
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        self.enabled = settings.TIERING_ENABLED if enabled is None else enabled
+        self.models = {
+            TIER_FAST: settings.TIER_FAST_MODEL,
+            TIER_STANDARD: settings.TIER_STANDARD_MODEL,
+            TIER_LARGE: settings.TIER_LARGE_MODEL,
+        }
+        self.api_urls = {
+            TIER_FAST: settings.ERNIE_FAST_API_URL,
+            TIER_STANDARD: "",
+            TIER_LARGE: settings.ERNIE_LARGE_API_URL,
+        }
+
+    def classify(self, segments: List[str], input_tokens: int, complexity: float, content_type: str) -> str:
+        if content_type == CONTENT_CODE:
+            return TIER_LARGE
+        if complexity >= settings.TIER_LARGE_MIN_COMPLEXITY and input_tokens >= settings.TIER_LARGE_MIN_TOKENS:
+            return TIER_LARGE
+        if content_type == CONTENT_LABEL or (
+            input_tokens <= settings.TIER_FAST_MAX_TOKENS and complexity < settings.TIER_LARGE_MIN_COMPLEXITY
+        ):
+            return TIER_FAST
+        return TIER_STANDARD
+
+    def estimate_max_tokens(self, input_tokens: int, segments: int, attempt: int = 0) -> Optional[int]:
+        """
+        译文token数按输入估算，留出编号开销，重试时翻倍；
+        超过 TIER_MAX_OUTPUT_TOKENS 时不设上限，不能把长段落的译文截断在估算长度以下
+        """
+        estimated = math.ceil(input_tokens * settings.TIER_OUTPUT_TOKEN_RATIO) + segments * SEGMENT_OVERHEAD_TOKENS
+        max_tokens = max(settings.TIER_MIN_OUTPUT_TOKENS, estimated) * 2 ** attempt
+        if max_tokens > settings.TIER_MAX_OUTPUT_TOKENS:
+            return None
+        return max_tokens
+
+    def choose(self, segments: List[str], attempt: int = 0) -> TierChoice:
+        """
+        为一组段落选择档位；重试时升一档并放宽 max_tokens，避免因截断反复失败
+        """
+        if not self.enabled:
+            return TierChoice(TIER_STANDARD, self.models[TIER_STANDARD])
+
+        text = '\n\n'.join(segments)
+        input_tokens = TextProcessor.estimate_tokens(text)
+        complexity = estimate_complexity(text)
+        content_type = detect_content_type(segments)
+        name = self.classify(segments, input_tokens, complexity, content_type)
+        if attempt:
+            name = TIER_ORDER[min(TIER_ORDER.index(name) + attempt, len(TIER_ORDER) - 1)]
+        return TierChoice(
+            name,
+            self.models[name],
+            api_url=self.api_urls[name],
+            max_tokens=self.estimate_max_tokens(input_tokens, len(segments), attempt),
+            input_tokens=input_tokens,
+            content_type=content_type,
+            complexity=complexity,
+        )
+
+
+class TierStats:
+    """
+    记录各档位的调用次数、延迟和token用量，用于调整分档阈值
+    """
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._tiers: Dict[str, dict] = {}
+
+    def _entry(self, tier: str) -> dict:
+        entry = self._tiers.get(tier)
+        if entry is None:
+            entry = {
+                "calls": 0,
+                "errors": 0,
+                "segments": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "max_tokens": 0,
+                "latencies": deque(maxlen=self.window),
+                "content_types": {},
+            }
+            self._tiers[tier] = entry
+        return entry
+
+    def record(
+        self,
+        tier: str,
+        choice: TierChoice,
+        segments: int,
+        latency: float,
+        output_tokens: int = 0,
+        ok: bool = True,
+    ):
+        entry = self._entry(tier)
+        entry["calls"] += 1
+        entry["segments"] += segments
+        entry["input_tokens"] += choice.input_tokens
+        entry["output_tokens"] += output_tokens
+        entry["max_tokens"] += choice.max_tokens or 0
+        entry["latencies"].append(latency)
+        entry["content_types"][choice.content_type] = entry["content_types"].get(choice.content_type, 0) + 1
+        if not ok:
+            entry["errors"] += 1
+
+    @staticmethod
+    def _percentile(values: Deque[float], pct: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def stats(self) -> Dict[str, dict]:
+        result = {}
+        for tier, entry in self._tiers.items():
+            calls = entry["calls"]
+            latencies = entry["latencies"]
+            result[tier] = {
+                "calls": calls,
+                "errors": entry["errors"],
+                "segments": entry["segments"],
+                "input_tokens": entry["input_tokens"],
+                "output_tokens": entry["output_tokens"],
+                # 实际输出占 max_tokens 的比例，过高说明上限偏紧
+                "output_ratio": round(entry["output_tokens"] / entry["max_tokens"], 3) if entry["max_tokens"] else None,
+                "latency_p50_ms": round(self._percentile(latencies, 0.5) * 1000, 1),
+                "latency_p95_ms": round(self._percentile(latencies, 0.95) * 1000, 1),
+                "content_types": dict(entry["content_types"]),
+            }
+        return result
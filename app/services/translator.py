@@ -1,42 +1,150 @@
-from typing import List
+from typing import Dict, List, Optional
 import re
+import json
 import logging
 import aiohttp
 import asyncio
+import time
 from abc import ABC, abstractmethod
-from openai import AsyncOpenAI
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import md5
+from typing import Callable
+from openai import AsyncOpenAI, RateLimitError
 from ..core.config import get_settings
+from ..core.logging import log_payload
+from ..core.tracing import span
+from ..core.http import HttpTransport
+from .hotkeys import HotKeyCache
+from .batching import DynamicBatcher
+from .tiering import TierChoice, TierPolicy, TierStats, TIER_FAST, TIER_LOCAL
+from .glossary import GlossaryCache, extract_terms, format_glossary, relevant_entries
+from ..utils.text import TextProcessor
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-PLACEHOLDER = "<<PARAGRAPH_BREAK>>"
+# 编号标记只在行首生效，正文中间出现的 [[n]] 不会被当作标记
+SEGMENT_MARKER = re.compile(r'^[ \t]*\[\[(\d+)\]\]', re.M)
+# 原文行首本身就是标记形式时，在前面加不可见的连字符转义，解析后去掉
+MARKER_ESCAPE = '\u2060'
+SEGMENT_INSTRUCTION = (
+    "Translate the following English text to Simplified Chinese. "
+    "The text is split into numbered segments, each starting with a marker like [[1]]. "
+    "Translate every segment separately, keep each marker unchanged on its own line before the translation, "
+    "and do not merge, split or drop segments."
+)
+
+# 文心接口的限流/配额错误码
+ERNIE_QUOTA_ERROR_CODES = {4, 17, 18, 19, 336501, 336502}
+# 文心接口允许的最大输出token数
+ERNIE_MAX_OUTPUT_TOKENS = 2048
+
+class QuotaExceededError(RuntimeError):
+    """上游接口限流或配额耗尽"""
+
+class TruncatedOutputError(RuntimeError):
+    """译文因达到 max_tokens 被截断，text 为已返回的部分"""
+
+    def __init__(self, message: str, text: str = ""):
+        super().__init__(message)
+        self.text = text
 
 class BaseTranslator(ABC):
     @abstractmethod
-    async def translate(self, text: str) -> str:
+    async def translate(self, text: str, tier: Optional[TierChoice] = None) -> str:
         pass
 
-    def replace_paragraph_breaks(self, text: str) -> str:
+    async def translate_segments(
+        self,
+        segments: List[str],
+        tier: Optional[TierChoice] = None,
+        glossary: Optional[Dict[str, str]] = None,
+    ) -> List[Optional[str]]:
         """
-        用占位符替换段落分隔符
+        批量翻译编号段落，缺失或错位的段落返回None
         """
-        return text.replace('\n\n', PLACEHOLDER)
+        try:
+            translated = await self.translate(self.segment_prompt(segments, glossary), tier=tier)
+        except TruncatedOutputError as e:
+            return self.parse_truncated(e.text, len(segments))
+        return self.parse_segments(translated, len(segments))
+
+    def parse_truncated(self, text: str, count: int) -> List[Optional[str]]:
+        """
+        解析被截断的译文：最后一个返回的段落可能不完整，和缺失的段落一起视为失败
+        """
+        results = self.parse_segments(text, count)
+        received = [idx for idx, result in enumerate(results) if result is not None]
+        if received:
+            results[received[-1]] = None
+        logger.warning("Output truncated, %d/%d segments usable", max(len(received) - 1, 0), count)
+        return results
+
+    def segment_prompt(self, segments: List[str], glossary: Optional[Dict[str, str]] = None) -> str:
+        """编号段落的提示，有术语表时附在说明之后"""
+        instruction = f"{SEGMENT_INSTRUCTION}\n\n{format_glossary(glossary)}" if glossary else SEGMENT_INSTRUCTION
+        return f"{instruction}\n\n{self.format_segments(segments)}"
+
+    def format_segments(self, segments: List[str]) -> str:
+        """
+        为每个段落加上编号标记
+        """
+        return '\n\n'.join(
+            f"[[{i}]]\n{SEGMENT_MARKER.sub(lambda m: MARKER_ESCAPE + m.group(), segment)}"
+            for i, segment in enumerate(segments, 1)
+        )
 
-    def restore_paragraph_breaks(self, text: str) -> str:
+    def parse_segments(self, text: str, count: int) -> List[Optional[str]]:
         """
-        将占位符替换回段落分隔符
+        按编号标记拆分译文，编号重复、越界或内容为空的段落视为缺失
         """
-        return text.replace(PLACEHOLDER, '\n\n')
+        parts = SEGMENT_MARKER.split(text.replace('\r\n', '\n'))
+        results: List[Optional[str]] = [None] * count
+        duplicates = set()
+        for number, body in zip(parts[1::2], parts[2::2]):
+            idx = int(number) - 1
+            if not 0 <= idx < count:
+                continue
+            if results[idx] is not None:
+                duplicates.add(idx)
+            results[idx] = body.replace(MARKER_ESCAPE, '').strip() or None
+        for idx in duplicates:
+            results[idx] = None
+        return results
+
+    async def warm_up(self):
+        """预先建立到上游的连接，默认不做任何事"""
 
 class OpenAITranslator(BaseTranslator):
-    def __init__(self, api_key: str):
-        self.openai_client = AsyncOpenAI(api_key=api_key)
+    def __init__(self, api_key: str, transport: Optional[HttpTransport] = None):
+        self._owns_transport = transport is None
+        self.transport = transport or HttpTransport()
+        self.openai_client = AsyncOpenAI(
+            api_key=api_key,
+            http_client=self.transport.client,
+            timeout=settings.OPENAI_TIMEOUT,
+        )
+
+    async def warm_up(self):
+        await self.transport.warm_up(str(self.openai_client.base_url))
 
-    async def translate(self, text: str) -> str:
+    async def close(self):
+        if self._owns_transport:
+            await self.transport.close()
+
+    def _model_options(self, tier: Optional[TierChoice]) -> dict:
+        """按档位选择模型和输出上限，未分档时使用默认模型"""
+        if tier is None:
+            return {"model": "gpt-4o"}
+        options = {"model": tier.model}
+        if tier.max_tokens:
+            options["max_tokens"] = tier.max_tokens
+        return options
+
+    async def translate(self, text: str, tier: Optional[TierChoice] = None) -> str:
         try:
             response = await self.openai_client.chat.completions.create(
-                model="gpt-4o",
+                **self._model_options(tier),
                 messages=[
                     {
                         "role": "system",
@@ -51,25 +159,101 @@ class OpenAITranslator(BaseTranslator):
                     }
                 ]
             )
-            translated_text = response.choices[0].message.content
+            choice = response.choices[0]
             # 统一换行符
-            translated_text = translated_text.replace('\r\n', '\n')
-            logger.debug(f"OpenAI Translated text: {translated_text}")
+            translated_text = (choice.message.content or "").replace('\r\n', '\n')
+            if choice.finish_reason == "length":
+                raise TruncatedOutputError("OpenAI output truncated at max_tokens", translated_text)
+            log_payload(logger, "OpenAI Translated text", translated_text)
             return translated_text
+        except RateLimitError as e:
+            logger.error(f"OpenAI rate limit reached: {str(e)}")
+            raise QuotaExceededError(str(e)) from e
         except Exception as e:
             logger.error(f"OpenAI translation error: {str(e)}")
             raise
 
+    async def translate_segments(
+        self,
+        segments: List[str],
+        tier: Optional[TierChoice] = None,
+        glossary: Optional[Dict[str, str]] = None,
+    ) -> List[Optional[str]]:
+        """
+        使用 JSON 模式批量翻译段落，按编号校验返回结果
+        """
+        source = {str(i): segment for i, segment in enumerate(segments, 1)}
+        system_prompt = (
+            "You are a professional translator. "
+            "Translate every value of the user's JSON object from English to Simplified Chinese, "
+            "preserving line breaks inside each value. "
+            "Reply with a JSON object that has exactly the same keys, each mapped to its translation."
+        )
+        if glossary:
+            system_prompt = f"{system_prompt}\n\n{format_glossary(glossary)}"
+        try:
+            response = await self.openai_client.chat.completions.create(
+                **self._model_options(tier),
+                response_format={"type": "json_object"},
+                messages=[
+                    {
+                        "role": "system",
+                        "content": system_prompt
+                    },
+                    {
+                        "role": "user",
+                        "content": json.dumps(source, ensure_ascii=False)
+                    }
+                ]
+            )
+            content = response.choices[0].message.content
+            if response.choices[0].finish_reason == "length":
+                # 截断的JSON无法解析，整块按失败重试
+                raise TruncatedOutputError("OpenAI output truncated at max_tokens")
+        except RateLimitError as e:
+            logger.error(f"OpenAI rate limit reached: {str(e)}")
+            raise QuotaExceededError(str(e)) from e
+        except Exception as e:
+            logger.error(f"OpenAI translation error: {str(e)}")
+            raise
+
+        try:
+            data = json.loads(content)
+        except (TypeError, ValueError):
+            logger.warning("OpenAI returned invalid JSON for segment translation")
+            return [None] * len(segments)
+        if not isinstance(data, dict):
+            return [None] * len(segments)
+
+        results = []
+        for key in source:
+            value = data.get(key)
+            if isinstance(value, str) and value.strip():
+                results.append(value.replace('\r\n', '\n').strip())
+            else:
+                results.append(None)
+        return results
+
 class ErnieTranslator(BaseTranslator):
-    def __init__(self, api_key: str, secret_key: str, api_url: str):
+    def __init__(self, api_key: str, secret_key: str, api_url: str, transport: Optional[HttpTransport] = None):
         self.api_key = api_key
         self.secret_key = secret_key
         self.api_url = api_url
         self.access_token = None
-        self.session = None
+        self._owns_transport = transport is None
+        self.transport = transport or HttpTransport()
+        self.timeout = self.transport.aiohttp_timeout(settings.ERNIE_TIMEOUT)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        return self.transport.session
 
     async def initialize_session(self):
-        self.session = aiohttp.ClientSession()
+        # 会话由共享连接池在首次使用时创建，这里提前创建
+        return self.session
+
+    async def warm_up(self):
+        await self.transport.warm_up(self.api_url, use_aiohttp=True)
 
     async def get_access_token(self) -> str:
         if self.access_token:
@@ -83,7 +267,7 @@ class ErnieTranslator(BaseTranslator):
         }
 
         try:
-            async with self.session.post(token_url, params=params) as response:
+            async with self.session.post(token_url, params=params, timeout=self.timeout) as response:
                 if response.status == 200:
                     data = await response.json()
                     self.access_token = data.get("access_token")
@@ -100,21 +284,39 @@ class ErnieTranslator(BaseTranslator):
             logger.error(f"Timeout error while getting access token: {str(e)}")
             raise
 
-    async def translate(self, text: str) -> str:
+    async def translate(self, text: str, tier: Optional[TierChoice] = None) -> str:
+        return await self._chat(
+            "Translate the following English text to Simplified Chinese while preserving the original formatting, including paragraphs and line breaks:\n\n"
+            f"{text}",
+            tier,
+        )
+
+    async def translate_segments(
+        self,
+        segments: List[str],
+        tier: Optional[TierChoice] = None,
+        glossary: Optional[Dict[str, str]] = None,
+    ) -> List[Optional[str]]:
+        try:
+            translated = await self._chat(self.segment_prompt(segments, glossary), tier)
+        except TruncatedOutputError as e:
+            return self.parse_truncated(e.text, len(segments))
+        return self.parse_segments(translated, len(segments))
+
+    async def _chat(self, content: str, tier: Optional[TierChoice] = None) -> str:
         try:
             access_token = await self.get_access_token()
-            url = f"{self.api_url}?access_token={access_token}"
+            api_url = (tier.api_url if tier else "") or self.api_url
+            url = f"{api_url}?access_token={access_token}"
+            max_tokens = min(tier.max_tokens, ERNIE_MAX_OUTPUT_TOKENS) if tier and tier.max_tokens else 2000
 
             payload = {
                 "messages": [{
                     "role": "user",
-                    "content": (
-                        "Translate the following English text to Simplified Chinese while preserving the original formatting, including paragraphs and line breaks:\n\n"
-                        f"{text}"
-                    )
+                    "content": content
                 }],
                 "temperature": 0.7,
-                "max_tokens": 2000,
+                "max_tokens": max_tokens,
                 "penalty_score": 1.0,
                 "enable_system_memory": False,
                 "disable_search": True,
@@ -126,13 +328,20 @@ class ErnieTranslator(BaseTranslator):
                 'Content-Type': 'application/json'
             }
 
-            async with self.session.post(url, headers=headers, json=payload) as response:
+            async with self.session.post(url, headers=headers, json=payload, timeout=self.timeout) as response:
                 if response.status != 200:
                     response_data = await response.text()
                     raise RuntimeError(f"Ernie API error: {response_data}")
 
                 response_json = await response.json()
-                logger.debug(f"Ernie API response: {response_json}")
+                logger.debug("Ernie API response keys: %s", list(response_json))
+
+                # 文心接口出错时仍返回200，错误信息在 error_code 中
+                error_code = response_json.get("error_code")
+                if error_code in ERNIE_QUOTA_ERROR_CODES:
+                    raise QuotaExceededError(f"Ernie quota exceeded: {response_json.get('error_msg')}")
+                if error_code:
+                    raise RuntimeError(f"Ernie API error {error_code}: {response_json.get('error_msg')}")
 
                 result = response_json.get("result")
                 if not result:
@@ -140,8 +349,10 @@ class ErnieTranslator(BaseTranslator):
 
                 # 统一换行符
                 result = result.replace('\r\n', '\n')
+                if response_json.get("is_truncated"):
+                    raise TruncatedOutputError("Ernie output truncated at max_tokens", result)
 
-                logger.debug(f"Ernie Translated text: {result}")
+                log_payload(logger, "Ernie Translated text", result)
 
                 return result
         except aiohttp.ClientError as e:
@@ -155,27 +366,146 @@ class ErnieTranslator(BaseTranslator):
             raise
 
     async def close(self):
-        if self.session:
-            await self.session.close()
+        if self._owns_transport:
+            await self.transport.close()
             logger.info("Ernie session closed")
 
+def load_ctranslate2_model(model_path: str, threads: int) -> Callable[[List[str]], List[str]]:
+    """
+    加载 CTranslate2 格式的本地翻译模型（如转换后的 Marian 模型），返回批量翻译函数
+    """
+    try:
+        import ctranslate2
+        from transformers import AutoTokenizer
+    except ImportError as e:
+        raise RuntimeError(
+            "Local translator requires ctranslate2 and transformers: "
+            "pip install ctranslate2 transformers sentencepiece"
+        ) from e
+
+    model = ctranslate2.Translator(model_path, device="cpu", intra_threads=threads)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+
+    def translate_batch(texts: List[str]) -> List[str]:
+        sources = [tokenizer.convert_ids_to_tokens(tokenizer.encode(text)) for text in texts]
+        results = model.translate_batch(sources, max_batch_size=len(sources), beam_size=2)
+        return [
+            tokenizer.decode(tokenizer.convert_tokens_to_ids(result.hypotheses[0]), skip_special_tokens=True)
+            for result in results
+        ]
+
+    return translate_batch
+
+class LocalTranslator(BaseTranslator):
+    """
+    本地CPU翻译模型，并发请求经动态批处理合并成一次推理
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        workers: int = 1,
+        threads: int = 4,
+        translate_batch: Optional[Callable[[List[str]], List[str]]] = None,
+    ):
+        self.model_path = model_path
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.workers = workers
+        self.threads = threads
+        # 测试时可直接注入批量翻译函数
+        self.translate_batch = translate_batch
+        self.executor = None
+        self.batcher = None
+
+    async def initialize(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="local-mt")
+        if self.translate_batch is None:
+            loop = asyncio.get_running_loop()
+            self.translate_batch = await loop.run_in_executor(
+                self.executor, load_ctranslate2_model, self.model_path, self.threads
+            )
+            logger.info(f"Local translation model loaded from {self.model_path}")
+        self.batcher = DynamicBatcher(
+            self.translate_batch,
+            self.executor,
+            max_batch_size=self.max_batch_size,
+            max_wait=self.max_wait_ms / 1000,
+            max_inflight_batches=self.workers,
+        )
+
+    async def translate(self, text: str, tier: Optional[TierChoice] = None) -> str:
+        # 模型按段落翻译，多段落拆开后各自进入批处理
+        paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
+        translated = await self.translate_segments(paragraphs)
+        missing = [i for i, result in enumerate(translated, 1) if result is None]
+        if missing:
+            # 模型对某些段落输出为空，不能拼出完整译文，交给服务重试或报错
+            raise RuntimeError(f"Local model returned empty translation for paragraphs {missing}")
+        return '\n\n'.join(translated)
+
+    async def translate_segments(
+        self,
+        segments: List[str],
+        tier: Optional[TierChoice] = None,
+        glossary: Optional[Dict[str, str]] = None,
+    ) -> List[Optional[str]]:
+        # 本地模型不支持术语表提示
+        if self.batcher is None:
+            await self.initialize()
+        results = await asyncio.gather(*[self.batcher.submit(segment) for segment in segments])
+        return [result.strip() or None for result in results]
+
+    async def close(self):
+        if self.batcher:
+            await self.batcher.close()
+        if self.executor:
+            self.executor.shutdown(wait=False)
+        logger.info("Local translator closed")
+
 class TranslationService:
-    def __init__(self):
+    def __init__(self, transport: Optional[HttpTransport] = None):
         api_key = settings.API_KEY
         logger.info(f"TranslationService initialized with API key: {api_key[:8]}...")
 
+        # 上游连接池，未传入时由服务自己创建和关闭
+        self._owns_transport = transport is None
+        self.transport = transport or HttpTransport()
+
         self.service_type = settings.TRANSLATOR_TYPE.lower()
         if self.service_type == "openai":
-            self.translator = OpenAITranslator(api_key=api_key)
+            self.translator = OpenAITranslator(api_key=api_key, transport=self.transport)
         elif self.service_type == "ernie":
             self.translator = ErnieTranslator(
                 api_key=settings.ERNIE_API_KEY,
                 secret_key=settings.ERNIE_SECRET_KEY,
-                api_url="https://aip.baidubce.com/rpc/2.0/ai_custom/v1/wenxinworkshop/chat/completions"
+                api_url="https://aip.baidubce.com/rpc/2.0/ai_custom/v1/wenxinworkshop/chat/completions",
+                transport=self.transport,
             )
+        elif self.service_type == "local":
+            self.translator = self._create_local_translator()
         else:
             raise ValueError(f"Unsupported translator type: {self.service_type}")
 
+        # 配置了本地模型时，用于短文本和上游配额耗尽时的溢出流量
+        self.local_translator = None
+        if isinstance(self.translator, LocalTranslator):
+            self.local_translator = self.translator
+        elif settings.LOCAL_MODEL_PATH:
+            self.local_translator = self._create_local_translator()
+
+        # 高频块的翻译结果常驻内存，命中时跳过上游调用
+        self.hot_chunks = HotKeyCache()
+
+        # 按块选择模型档位，并记录各档位的延迟和token用量
+        self.tiering = TierPolicy()
+        self.tier_stats = TierStats()
+
+        # 文档术语表，按文档哈希缓存
+        self.glossaries = GlossaryCache()
+
     def split_text_by_paragraphs(self, text: str) -> List[str]:
         """
         按段落分割文本，保留段落结构
@@ -191,88 +521,248 @@ class TranslationService:
         sentences = re.split(sentence_ends, text)
         return [s.strip() for s in sentences if s.strip()]
 
-    def merge_chunks_by_size(self, paragraphs: List[str], chunk_size: int = 1000) -> List[str]:
+    def group_paragraphs_by_size(self, paragraphs: List[str], chunk_size: int = 1000) -> List[List[str]]:
         """
-        将段落合并成适当大小的块，保持段落完整性
+        将段落分组成适当大小的块，保持段落完整性
         """
-        chunks = []
-        current_chunk = []
+        groups = []
+        current_group = []
         current_size = 0
 
         for paragraph in paragraphs:
             paragraph_size = len(paragraph)
 
             # 检查添加当前段落是否会超出chunk_size
-            if current_size + paragraph_size + 2 > chunk_size and current_chunk:
-                chunks.append('\n\n'.join(current_chunk))
-                current_chunk = []
+            if current_size + paragraph_size + 2 > chunk_size and current_group:
+                groups.append(current_group)
+                current_group = []
                 current_size = 0
 
-            current_chunk.append(paragraph)
+            current_group.append(paragraph)
             current_size += paragraph_size + 2  # +2 for two newline characters
 
-        # 添加最后一个chunk
-        if current_chunk:
-            chunks.append('\n\n'.join(current_chunk))
+        # 添加最后一组
+        if current_group:
+            groups.append(current_group)
 
-        return chunks
+        return groups
 
-    async def translate_text(self, text: str) -> str:
-        """翻译文本"""
+    def merge_chunks_by_size(self, paragraphs: List[str], chunk_size: int = 1000) -> List[str]:
+        """
+        将段落合并成适当大小的块，保持段落完整性
+        """
+        return ['\n\n'.join(group) for group in self.group_paragraphs_by_size(paragraphs, chunk_size)]
+
+    def _create_local_translator(self) -> LocalTranslator:
+        return LocalTranslator(
+            model_path=settings.LOCAL_MODEL_PATH,
+            max_batch_size=settings.LOCAL_MAX_BATCH_SIZE,
+            max_wait_ms=settings.LOCAL_BATCH_WAIT_MS,
+            workers=settings.LOCAL_WORKERS,
+            threads=settings.LOCAL_THREADS,
+        )
+
+    def _select_translator(self, segments: List[str], tier: TierChoice) -> BaseTranslator:
+        """短文本和快速档（开启 TIER_FAST_LOCAL 时）优先交给本地模型"""
+        if not self.local_translator:
+            return self.translator
+        if settings.TIER_FAST_LOCAL and tier.name == TIER_FAST:
+            return self.local_translator
+        if settings.LOCAL_SHORT_TEXT_MAX_CHARS > 0 and all(
+            len(segment) <= settings.LOCAL_SHORT_TEXT_MAX_CHARS for segment in segments
+        ):
+            return self.local_translator
+        return self.translator
+
+    async def _call_recorded(self, translator: BaseTranslator, segments: List[str], tier: TierChoice, call):
+        """调用翻译器并按档位记录延迟和输出token数"""
+        label = TIER_LOCAL if isinstance(translator, LocalTranslator) else tier.name
+        start = time.perf_counter()
         try:
-            return await self.translator.translate(text)
+            result = await call(translator)
+        except Exception:
+            self.tier_stats.record(label, tier, len(segments), time.perf_counter() - start, ok=False)
+            raise
+        outputs = [result] if isinstance(result, str) else [item for item in result if item]
+        output_tokens = sum(TextProcessor.estimate_tokens(item) for item in outputs)
+        self.tier_stats.record(label, tier, len(segments), time.perf_counter() - start, output_tokens)
+        return result
+
+    async def _with_overflow(self, segments: List[str], tier: TierChoice, call):
+        """调用选中的翻译器，上游配额耗尽时溢出到本地模型"""
+        translator = self._select_translator(segments, tier)
+        try:
+            return await self._call_recorded(translator, segments, tier, call)
+        except QuotaExceededError as e:
+            if not self.local_translator or translator is self.local_translator:
+                logger.error(f"Translation error ({self.service_type}): {str(e)}")
+                raise
+            logger.warning("Upstream quota exceeded, falling back to local model: %s", e)
+            return await self._call_recorded(self.local_translator, segments, tier, call)
         except Exception as e:
             logger.error(f"Translation error ({self.service_type}): {str(e)}")
             raise
 
-    async def translate_chunks(self, text: str, chunk_size: int = 1000, max_concurrent: int = 10) -> str:
-        if len(text) <= chunk_size:
-            translated = await self.translate_text(self.translator.replace_paragraph_breaks(text))
-            return self.translator.restore_paragraph_breaks(translated)
+    async def translate_text(self, text: str, tier: Optional[TierChoice] = None) -> str:
+        """翻译文本"""
+        tier = tier or self.tiering.choose([text])
+        with span("upstream", segments=1, chars=len(text), tier=tier.name):
+            return await self._with_overflow([text], tier, lambda translator: translator.translate(text, tier=tier))
+
+    async def translate_segments(
+        self,
+        segments: List[str],
+        attempt: int = 0,
+        glossary: Optional[Dict[str, str]] = None,
+    ) -> List[Optional[str]]:
+        """
+        翻译一组段落，单个段落且没有术语表时直接翻译，不附加编号协议；重试时按 attempt 升档
+        """
+        tier = self.tiering.choose(segments, attempt)
+        if len(segments) == 1 and not glossary:
+            translated = (await self.translate_text(segments[0], tier)).strip()
+            return [translated or None]
+        with span("upstream", segments=len(segments), chars=sum(len(segment) for segment in segments), tier=tier.name):
+            return await self._with_overflow(
+                segments,
+                tier,
+                lambda translator: translator.translate_segments(segments, tier=tier, glossary=glossary),
+            )
+
+    async def translate_chunk(self, segments: List[str], glossary: Optional[Dict[str, str]] = None) -> List[str]:
+        """
+        翻译单个块中的段落，只重发缺失或错位的段落；热点块直接从内存返回
+        """
+        # 术语表不同时译文可能不同，一并计入key
+        key_source = '\n\n'.join(segments)
+        if glossary:
+            key_source += json.dumps(glossary, ensure_ascii=False, sort_keys=True)
+        chunk_key = md5(key_source.encode()).hexdigest()
+        is_hot = self.hot_chunks.record(chunk_key)
+        pinned = self.hot_chunks.get(chunk_key)
+        if pinned is not None:
+            return pinned
+
+        results: List[Optional[str]] = [None] * len(segments)
+        pending = list(range(len(segments)))
+        error = "segment missing from response"
+        with span("chunk", segments=len(segments)) as attrs:
+            for attempt in range(settings.SEGMENT_MAX_RETRIES + 1):
+                if attempt:
+                    logger.warning("Retrying %d/%d segments (attempt %d)", len(pending), len(segments), attempt)
+                attrs["attempts"] = attempt + 1
+                try:
+                    translated = await self.translate_segments([segments[i] for i in pending], attempt, glossary)
+                except Exception as e:
+                    error = str(e)
+                    continue
+                for i, segment in zip(pending, translated):
+                    if segment is not None:
+                        results[i] = segment
+                pending = [i for i in pending if results[i] is None]
+                if not pending:
+                    break
+            attrs["failed"] = len(pending)
+
+        if pending:
+            logger.error(f"Failed to translate {len(pending)} segments: {error}")
+            for i in pending:
+                results[i] = f"[Translation Error: {error}]"
+        elif is_hot:
+            self.hot_chunks.pin(chunk_key, results)
+        return results
 
-        # 1. 按段落分割文本
-        paragraphs = self.split_text_by_paragraphs(text)
+    async def translate_chunks(self, text: str, chunk_size: int = 1000, max_concurrent: int = 10) -> str:
+        with span("segmentation") as attrs:
+            # 1. 按段落分割文本
+            paragraphs = self.split_text_by_paragraphs(text)
 
-        # 2. 将段落合并成适当大小的块
-        chunks = self.merge_chunks_by_size(paragraphs, chunk_size)
+            # 2. 将段落分组成适当大小的块，每个段落作为一个编号段
+            groups = self.group_paragraphs_by_size(paragraphs, chunk_size)
+            attrs.update(paragraphs=len(paragraphs), chunks=len(groups))
 
-        # 3. 使用占位符替换段落分隔符
-        chunks_with_placeholders = [self.translator.replace_paragraph_breaks(chunk) for chunk in chunks]
+        # 3. 提取全文术语，首轮翻译术语的同时，不含术语的块直接开始翻译
+        chunks = ['\n\n'.join(group) for group in groups]
+        glossary = self._start_glossary(text, chunks)
 
         # 4. 翻译每个块
         semaphore = asyncio.Semaphore(max_concurrent)
 
-        async def translate_with_semaphore(chunk):
+        async def translate_with_semaphore(group, chunk):
+            entries = None
+            if glossary is not None:
+                terms, pending = glossary
+                if any(term in chunk for term in terms):
+                    # 在获取并发槽位之前等待术语表，等待期间不占用槽位
+                    entries = relevant_entries(await pending, chunk)
             async with semaphore:
-                return await self.translate_text(chunk)
+                return await self.translate_chunk(group, entries)
 
-        translated_chunks = await asyncio.gather(
-            *[translate_with_semaphore(chunk) for chunk in chunks_with_placeholders],
-            return_exceptions=True
-        )
+        try:
+            translated_groups = await asyncio.gather(
+                *[translate_with_semaphore(group, chunk) for group, chunk in zip(groups, chunks)]
+            )
+        finally:
+            if glossary is not None and not glossary[1].done():
+                glossary[1].cancel()
 
-        # 5. 处理可能的异常并合并翻译结果
-        final_translations = []
-        for idx, result in enumerate(translated_chunks):
-            if isinstance(result, Exception):
-                logger.error(f"Error translating chunk {idx}: {str(result)}")
-                final_translations.append(f"[Translation Error: {str(result)}]")
-            else:
-                # 恢复段落分隔符
-                restored = self.translator.restore_paragraph_breaks(result)
-                final_translations.append(restored)
+        # 5. 按段落顺序合并翻译结果
+        with span("assembly"):
+            return '\n\n'.join(segment for group in translated_groups for segment in group)
 
-        # 6. 合并所有翻译后的块
-        return '\n\n'.join(final_translations)
+    def _start_glossary(self, text: str, chunks: List[str]):
+        """
+        返回 (术语列表, 术语表任务)；文档只有一个块、没有跨块术语或主翻译服务是本地模型时返回None
+        """
+        if (
+            not settings.GLOSSARY_ENABLED
+            or len(chunks) < settings.GLOSSARY_MIN_CHUNKS
+            or isinstance(self.translator, LocalTranslator)
+        ):
+            return None
+        doc_hash = md5(text.encode()).hexdigest()
+        cached = self.glossaries.get(doc_hash)
+        if cached is not None:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(cached)
+            return list(cached), future
+        terms = extract_terms(chunks)
+        if not terms:
+            return None
+        return terms, asyncio.ensure_future(self._build_glossary(doc_hash, terms))
+
+    async def _build_glossary(self, doc_hash: str, terms: List[str]) -> Dict[str, str]:
+        """首轮翻译术语并缓存；失败时不使用术语表，不影响正文翻译"""
+        with span("glossary", terms=len(terms)) as attrs:
+            try:
+                translated = await self.translate_segments(terms)
+            except Exception as e:
+                logger.warning("Glossary translation failed, continuing without it: %s", e)
+                attrs["failed"] = True
+                return {}
+            glossary = {term: value for term, value in zip(terms, translated) if value}
+            attrs["entries"] = len(glossary)
+        self.glossaries.set(doc_hash, glossary)
+        return glossary
 
     async def close(self):
         """关闭翻译服务，释放资源"""
         if isinstance(self.translator, ErnieTranslator):
             await self.translator.close()
+        if self.local_translator:
+            await self.local_translator.close()
+        if self._owns_transport:
+            await self.transport.close()
 
     async def initialize(self):
         if isinstance(self.translator, ErnieTranslator):
             await self.translator.initialize_session()
+        if self.local_translator:
+            await self.local_translator.initialize()
+
+    async def warm_up(self):
+        """启动时预先建立到主翻译服务的连接，失败只记录日志"""
+        await self.translator.warm_up()
 
 # 使用示例
 # async def main():
@@ -0,0 +1,157 @@
+import gzip
+import json
+import zlib
+from typing import Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 未安装时退回标准库
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+def encode_json(data) -> bytes:
+    """序列化为紧凑的UTF-8 JSON，优先使用 orjson"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_json(body: bytes):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+class DecompressionError(ValueError):
+    """请求体无法解压，status_code 为对应的HTTP状态码"""
+
+    status_code = 400
+
+
+class UnsupportedEncodingError(DecompressionError):
+    status_code = 415
+
+
+class BodyTooLargeError(DecompressionError):
+    status_code = 413
+
+
+def _compress_zstd(body: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=3).compress(body)
+
+
+def _decompress_zstd(body: bytes, max_size: int) -> bytes:
+    with zstandard.ZstdDecompressor().stream_reader(body) as reader:
+        return reader.read(max_size + 1)
+
+
+def _decompress_gzip(body: bytes, max_size: int) -> bytes:
+    return zlib.decompressobj(wbits=16 + zlib.MAX_WBITS).decompress(body, max_size + 1)
+
+
+# 按优先顺序排列：zstd 压缩最快，其次 br，gzip 兼容性最好
+COMPRESSORS = {}
+# 请求体只接受能限制解压输出大小的算法；brotli 的 Python 绑定无法限制单次输出，不接受 br
+DECOMPRESSORS = {"gzip": _decompress_gzip}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = _compress_zstd
+    DECOMPRESSORS["zstd"] = _decompress_zstd
+if brotli is not None:
+    COMPRESSORS["br"] = lambda body: brotli.compress(body, quality=2)
+COMPRESSORS["gzip"] = lambda body: gzip.compress(body, compresslevel=3)
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """解析 Accept-Encoding，返回 编码 -> q值"""
+    accepted = {}
+    if not header:
+        return accepted
+    for item in header.split(","):
+        parts = item.strip().split(";")
+        name = parts[0].strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def negotiate_encoding(header: Optional[str], available: Optional[List[str]] = None) -> Optional[str]:
+    """
+    根据 Accept-Encoding 选择压缩算法，q值相同时按 COMPRESSORS 的顺序优先
+    """
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in available or list(COMPRESSORS):
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    return COMPRESSORS[encoding](body)
+
+
+def decompress(body: bytes, encoding: str, max_size: int) -> bytes:
+    """
+    解压请求体，解压输出最多 max_size+1 字节，超过 max_size 时抛出 BodyTooLargeError，防止压缩炸弹
+    """
+    decompressor = DECOMPRESSORS.get(encoding)
+    if decompressor is None:
+        raise UnsupportedEncodingError(f"Unsupported content encoding: {encoding}")
+    try:
+        data = decompressor(body, max_size)
+    except Exception as e:
+        raise DecompressionError(f"Invalid {encoding} body: {e}") from e
+    if len(data) > max_size:
+        raise BodyTooLargeError("Decompressed body too large")
+    return data
+
+
+class PreparedResponse:
+    """
+    预先序列化的响应体，各压缩版本在首次使用时生成并缓存
+    """
+
+    __slots__ = ("body", "variants")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.variants: Dict[str, bytes] = {}
+
+    @classmethod
+    def from_data(cls, data) -> "PreparedResponse":
+        return cls(encode_json(data))
+
+    @property
+    def nbytes(self) -> int:
+        """响应体及已生成的压缩版本占用的字节数"""
+        return len(self.body) + sum(len(variant) for variant in self.variants.values())
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        variant = self.variants.get(encoding)
+        if variant is None:
+            variant = compress(self.body, encoding)
+            self.variants[encoding] = variant
+        return variant
@@ -66,6 +66,14 @@ class TextProcessor:
         """合并原文和翻译，保持格式"""
         return f"{translated}\n\n原文：\n{original}"
     
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """粗略估算文本的token数：中日韩字符按1个计，其余按4个字符1个计"""
+        if not text:
+            return 0
+        cjk_chars = len(re.findall(r'[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]', text))
+        return cjk_chars + (len(text) - cjk_chars + 3) // 4
+
     @staticmethod
     def detect_language(text: str) -> str:
         """简单的语言检测"""
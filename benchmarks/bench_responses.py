@@ -0,0 +1,78 @@
+"""
+响应序列化与压缩的吞吐对比
+
+    python -m benchmarks.bench_responses
+
+before: FastAPI 默认路径（jsonable_encoder + json.dumps，不压缩）
+after:  orjson 序列化 + 协商压缩；cached 为预编码响应命中（只取已缓存的压缩结果）
+"""
+import json
+import time
+import random
+from fastapi.encoders import jsonable_encoder
+from app.utils.encoding import COMPRESSORS, PreparedResponse, encode_json
+
+SIZES = [10 * 1024, 100 * 1024, 1024 * 1024, 5 * 1024 * 1024]
+WORDS = ["translation", "cache", "latency", "model", "request", "paragraph", "service", "token"]
+
+
+def make_payload(size: int) -> dict:
+    """随机中文为主、夹杂英文单词和段落的译文"""
+    rng = random.Random(size)
+    parts, length = [], 0
+    while length < size:
+        roll = rng.random()
+        if roll < 0.05:
+            part = "。\n\n"
+        elif roll < 0.15:
+            part = f" {rng.choice(WORDS)} "
+        elif roll < 0.25:
+            part = "，"
+        else:
+            part = chr(0x4E00 + int(rng.paretovariate(1.2) * 40) % 3500)
+        parts.append(part)
+        length += len(part.encode("utf-8"))
+    return {"translated_text": "".join(parts)}
+
+
+def default_encode(data) -> bytes:
+    return json.dumps(
+        jsonable_encoder(data), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def measure(fn, min_time: float = 0.5) -> float:
+    """返回单次调用的平均耗时（秒）"""
+    runs, start = 0, time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs
+
+
+def main():
+    print(f"{'size':>8} {'variant':<16} {'ms/op':>9} {'MB/s':>9} {'bytes out':>11}")
+    for size in SIZES:
+        data = make_payload(size)
+        raw = default_encode(data)
+        mb = len(raw) / 1e6
+        rows = [("before:json", measure(lambda: default_encode(data)), len(raw))]
+        rows.append(("after:orjson", measure(lambda: encode_json(data)), len(raw)))
+        for encoding in COMPRESSORS:
+            out = PreparedResponse.from_data(data).encoded(encoding)
+            rows.append((
+                f"after:{encoding}",
+                measure(lambda: PreparedResponse.from_data(data).encoded(encoding)),
+                len(out),
+            ))
+            prepared = PreparedResponse.from_data(data)
+            prepared.encoded(encoding)
+            rows.append((f"cached:{encoding}", measure(lambda: prepared.encoded(encoding)), len(out)))
+        for name, seconds, out_bytes in rows:
+            print(f"{size // 1024:>6}KB {name:<16} {seconds * 1000:>9.3f} {mb / seconds:>9.1f} {out_bytes:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import translate
+from app.api import translate, admin
 from app.core.config import get_settings
+from app.core.logging import setup_logging, shutdown_logging
+from app.core.tracing import start_trace, finish_trace
+from app.core.middleware import DecompressRequestMiddleware
 
 import logging
 from dotenv import load_dotenv
 from app.services.translator import TranslationService
+from app.services.fetcher import PageFetcher
+from app.core.http import HttpTransport
 import os
 
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# 配置日志：后台线程写入，请求路径只负责入队
+setup_logging()
 
 logger = logging.getLogger(__name__)
 load_dotenv()
@@ -32,7 +34,22 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 支持压缩的请求体
+app.add_middleware(DecompressRequestMiddleware, max_size=settings.MAX_REQUEST_BODY_BYTES)
 app.include_router(translate.router)
+app.include_router(admin.router)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """为每个请求分配追踪ID，并在响应头中返回"""
+    trace = start_trace(request.headers.get("X-Trace-Id"), name=f"{request.method} {request.url.path}")
+    try:
+        response = await call_next(request)
+        trace.attrs["status_code"] = response.status_code
+        response.headers["X-Trace-Id"] = trace.trace_id
+        return response
+    finally:
+        finish_trace(trace)
 
 # 全局 TranslationService 实例
 translation_service = None
@@ -40,16 +57,29 @@ translation_service = None
 @app.on_event("startup")
 async def startup_event():
     global translation_service
-    translation_service = TranslationService()
+    # 翻译服务和网页抓取共享同一个上游连接池
+    app.state.http_transport = HttpTransport()
+    translation_service = TranslationService(transport=app.state.http_transport)
     await translation_service.initialize()
     app.state.translation_service = translation_service
     logger.info("TranslationService initialized.")
 
+    app.state.page_fetcher = PageFetcher(transport=app.state.http_transport)
+    await app.state.page_fetcher.initialize()
+
+    if settings.HTTP_WARMUP_ENABLED:
+        await translation_service.warm_up()
+
 @app.on_event("shutdown")
 async def shutdown_event():
     if translation_service:
         await translation_service.close()
         logger.info("TranslationService shut down.")
+    if getattr(app.state, "page_fetcher", None):
+        await app.state.page_fetcher.close()
+    if getattr(app.state, "http_transport", None):
+        await app.state.http_transport.close()
+    shutdown_logging()
 
 
 if __name__ == "__main__":
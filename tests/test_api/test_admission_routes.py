@@ -0,0 +1,95 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import translate
+from app.services.admission import AdmissionController
+from app.services.cache import TranslationCache
+
+class FakeService:
+    def __init__(self):
+        self.calls = 0
+
+    async def translate_chunks(self, text: str) -> str:
+        self.calls += 1
+        return f"译:{text}"
+
+@pytest.fixture
+def controller():
+    # 配额上限很小，任何需要调用上游的请求都会被拒绝
+    return AdmissionController(token_burst=1, tokens_per_second=1, enabled=True)
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, controller):
+    monkeypatch.setattr(translate, "cache_service", TranslationCache(cache_dir=str(tmp_path)))
+    app = FastAPI()
+    app.include_router(translate.router)
+    app.state.translation_service = FakeService()
+    app.dependency_overrides[translate.get_admission_controller] = lambda: controller
+    with TestClient(app) as client:
+        yield client
+
+def test_cache_hit_skips_admission(client, controller):
+    """测试缓存命中不经过准入控制，未命中的请求才占用配额"""
+    translate.cache_service.set("Cached text", "缓存译文")
+
+    response = client.post("/translate", json={"text": "Cached text"})
+    assert response.status_code == 200
+    assert response.json() == {"translated_text": "缓存译文"}
+    assert controller.stats()["tenants"] == 0
+
+    # 未命中的请求消耗配额，配额很小时第二次即被拒绝
+    response = client.post("/translate", json={"text": "Uncached text"})
+    assert response.status_code == 200
+    response = client.post("/translate", json={"text": "Another uncached text"})
+    assert response.status_code == 429
+    assert client.app.state.translation_service.calls == 1
+
+def test_large_document_admitted_at_default_settings(tmp_path, monkeypatch):
+    """测试默认配置下，预估token数超过单租户突发上限的大文档也能翻译"""
+    monkeypatch.setattr(translate, "cache_service", TranslationCache(cache_dir=str(tmp_path)))
+    app = FastAPI()
+    app.include_router(translate.router)
+    app.state.translation_service = FakeService()
+    controller = AdmissionController(enabled=True)
+    app.dependency_overrides[translate.get_admission_controller] = lambda: controller
+    text = "The committee reviewed the proposal and agreed on a new schedule for the release. " * 1200
+
+    with TestClient(app) as client:
+        response = client.post("/translate", json={"text": text})
+
+    assert len(text) > 90000
+    assert response.status_code == 200
+    assert response.json()["translated_text"] == f"译:{text}"
+
+def test_unregistered_api_key_uses_client_address(monkeypatch, controller):
+    """测试未登记的 X-API-Key 不能获得单独的配额"""
+    monkeypatch.setattr(translate, "tenant_api_keys", frozenset({"registered"}))
+    app = FastAPI()
+
+    @app.get("/tenant")
+    async def tenant(params: translate.AdmissionParams = translate.Depends()):
+        return {"tenant": params.tenant}
+
+    with TestClient(app) as client:
+        anonymous = client.get("/tenant").json()
+        assert client.get("/tenant", headers={"X-API-Key": "random"}).json() == anonymous
+        assert client.get("/tenant", headers={"X-API-Key": "registered"}).json() == {"tenant": "registered"}
+
+def test_cache_hit_serves_encoded_body(client):
+    """测试磁盘缓存保存编码后的响应体，再次命中时不读取缓存记录"""
+    cache = translate.cache_service
+    cache.set("Cached text", "缓存译文")
+    first = client.post("/translate", json={"text": "Cached text"})
+    assert cache.get_response("Cached text") == first.content
+
+    # 删除缓存记录后仍然按响应体返回
+    for record in cache.cache_dir.glob("*.json"):
+        record.unlink()
+    second = client.post("/translate", json={"text": "Cached text"})
+    assert second.status_code == 200
+    assert second.content == first.content
+
+    cache.set("Cached text", "新译文")
+    assert cache.get_response("Cached text") is None
+    cache.clear()
+    assert list(cache.cache_dir.iterdir()) == []
@@ -0,0 +1,69 @@
+import gzip
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from app.api.responses import json_response
+from app.core.middleware import DecompressRequestMiddleware
+
+class EchoRequest(BaseModel):
+    text: str
+
+@pytest.fixture
+def echo_client():
+    app = FastAPI()
+    app.add_middleware(DecompressRequestMiddleware, max_size=1024 * 1024)
+
+    @app.post("/echo")
+    async def echo(request: EchoRequest, http_request: Request):
+        return await json_response(http_request, {"translated_text": request.text})
+
+    return TestClient(app)
+
+def test_large_response_is_compressed(echo_client):
+    """测试大响应按 Accept-Encoding 压缩"""
+    text = "translation " * 1000
+    response = echo_client.post("/echo", json={"text": text}, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["translated_text"] == text
+
+def test_small_response_is_not_compressed(echo_client):
+    """测试小响应不压缩"""
+    response = echo_client.post("/echo", json={"text": "hi"}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"translated_text": "hi"}
+
+def test_compressed_request_body(echo_client):
+    """测试压缩的请求体"""
+    body = gzip.compress('{"text": "压缩请求"}'.encode("utf-8"))
+    response = echo_client.post(
+        "/echo",
+        content=body,
+        headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"translated_text": "压缩请求"}
+
+def test_unsupported_request_encoding(echo_client):
+    """测试不支持的请求压缩格式"""
+    response = echo_client.post(
+        "/echo",
+        content=b"xxxx",
+        headers={"Content-Encoding": "compress", "Content-Type": "application/json"},
+    )
+    assert response.status_code == 415
+
+@pytest.mark.parametrize("encoding, body, status_code", [
+    ("br", b"\x1b\xff\xff", 415),
+    ("gzip", gzip.compress(b"0" * (2 * 1024 * 1024)), 413),
+    ("gzip", b"not gzip", 400),
+])
+def test_rejected_request_bodies(echo_client, encoding, body, status_code):
+    """测试 br 请求体被拒绝、压缩炸弹返回413、损坏的请求体返回400"""
+    response = echo_client.post(
+        "/echo",
+        content=body,
+        headers={"Content-Encoding": encoding, "Content-Type": "application/json"},
+    )
+    assert response.status_code == status_code
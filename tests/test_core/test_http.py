@@ -0,0 +1,68 @@
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from app.core.http import HttpTransport
+from app.services.fetcher import PageFetcher
+
+@pytest_asyncio.fixture
+async def server():
+    async def hello(request):
+        return web.Response(text="<html><body><p>" + "Shared connection pools keep latency low. " * 10 + "</p></body></html>",
+                            content_type="text/html")
+
+    app = web.Application()
+    app.router.add_route("*", "/", hello)
+    server = TestServer(app)
+    await server.start_server()
+    yield server
+    await server.close()
+
+@pytest_asyncio.fixture
+async def transport():
+    transport = HttpTransport(max_connections=4)
+    yield transport
+    await transport.close()
+
+@pytest.mark.asyncio
+async def test_aiohttp_connections_are_reused(server, transport):
+    """测试 aiohttp 会话复用 keep-alive 连接"""
+    url = str(server.make_url("/"))
+    for _ in range(3):
+        async with transport.session.get(url) as response:
+            await response.read()
+
+    stats = transport.stats()["aiohttp"]
+    assert stats["requests"] == 3
+    assert stats["connections"] == 1
+    assert stats["reused"] == 2
+    assert stats["idle"] == 1
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_pooled_connections(server, transport):
+    """测试预热后连接留在池中，之后的请求不再新建连接"""
+    url = str(server.make_url("/"))
+    assert await transport.warm_up(url, connections=2) == 2
+    stats = transport.stats()["httpx"]
+    assert stats["connections"] == 2
+    assert stats["open"] == 2
+
+    await transport.client.get(url)
+    assert transport.stats()["httpx"]["connections"] == 2
+
+@pytest.mark.asyncio
+async def test_warm_up_failure_is_not_fatal(transport):
+    """测试预热失败只记录日志"""
+    assert await transport.warm_up("http://127.0.0.1:9/", connections=1, use_aiohttp=True) == 0
+
+@pytest.mark.asyncio
+async def test_fetcher_shares_transport(server, transport):
+    """测试抓取器使用共享连接池，关闭抓取器不关闭连接池"""
+    fetcher = PageFetcher(transport=transport, allow_private_networks=True)
+    await fetcher.initialize()
+    text = await fetcher.fetch_text(str(server.make_url("/")))
+    await fetcher.close()
+
+    assert "Shared connection pools" in text
+    assert transport.stats()["aiohttp"]["requests"] == 1
+    assert not transport.session.closed
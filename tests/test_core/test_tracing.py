@@ -0,0 +1,84 @@
+import json
+import asyncio
+import logging
+import pytest
+from app.core import tracing
+from app.core import logging as app_logging
+from app.core.tracing import span, start_trace, finish_trace, current_trace
+
+@pytest.mark.asyncio
+async def test_spans_collected_across_tasks():
+    """测试并发子任务的耗时记录到同一个追踪中"""
+    trace = start_trace("abc123")
+
+    async def chunk(i):
+        with span("chunk", index=i):
+            await asyncio.sleep(0.01)
+
+    with span("segmentation") as attrs:
+        attrs["chunks"] = 3
+    await asyncio.gather(*[chunk(i) for i in range(3)])
+
+    data = trace.to_dict()
+    assert data["trace_id"] == "abc123"
+    names = [s["name"] for s in data["spans"]]
+    assert names.count("chunk") == 3
+    assert data["spans"][0]["name"] == "segmentation"
+    assert data["spans"][0]["chunks"] == 3
+    assert all(s["duration_ms"] >= 10 for s in data["spans"] if s["name"] == "chunk")
+    finish_trace(trace)
+    assert current_trace() is None
+
+def test_span_without_trace_is_noop():
+    """测试没有追踪时 span 不报错"""
+    with span("cache.get") as attrs:
+        attrs["hit"] = True
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+@pytest.fixture
+def exported_traces():
+    """直接挂在 trace 日志记录器上收集导出的追踪"""
+    handler = ListHandler()
+    trace_logger = logging.getLogger("trace")
+    trace_logger.addHandler(handler)
+    previous_level = trace_logger.level
+    trace_logger.setLevel(logging.INFO)
+    yield handler.messages
+    trace_logger.removeHandler(handler)
+    trace_logger.setLevel(previous_level)
+
+def test_trace_export_sampling(monkeypatch, exported_traces):
+    """测试慢请求始终导出，其他请求按采样率导出"""
+    monkeypatch.setattr(tracing.settings, "TRACE_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(tracing.settings, "TRACE_SLOW_MS", 0.0)
+    trace = start_trace()
+    with span("assembly"):
+        pass
+    finish_trace(trace)
+    assert json.loads(exported_traces[0])["trace_id"] == trace.trace_id
+
+    monkeypatch.setattr(tracing.settings, "TRACE_SLOW_MS", 1e9)
+    finish_trace(start_trace())
+    assert len(exported_traces) == 1
+
+def test_log_payload_sampled_and_truncated(monkeypatch, caplog):
+    """测试内容日志的采样和截断"""
+    logger = logging.getLogger("test_payload")
+    monkeypatch.setattr(app_logging.settings, "LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(app_logging.settings, "LOG_PAYLOAD_MAX_CHARS", 10)
+    with caplog.at_level(logging.DEBUG, logger="test_payload"):
+        app_logging.log_payload(logger, "Request text", "x" * 100)
+    assert caplog.records[-1].getMessage() == "Request text: xxxxxxxxxx... (100 chars)"
+
+    monkeypatch.setattr(app_logging.settings, "LOG_PAYLOAD_SAMPLE_RATE", 0.0)
+    caplog.clear()
+    with caplog.at_level(logging.DEBUG, logger="test_payload"):
+        app_logging.log_payload(logger, "Request text", "hello")
+    assert not caplog.records
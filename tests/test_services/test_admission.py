@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from app.services import admission as admission_module
+from app.services.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+)
+
+def make_controller(**kwargs):
+    params = dict(
+        max_concurrent=1,
+        max_queue=4,
+        bulk_max_queue=4,
+        tokens_per_second=1000,
+        token_burst=1000,
+        enabled=True,
+    )
+    params.update(kwargs)
+    return AdmissionController(**params)
+
+@pytest.mark.asyncio
+async def test_quota_exceeded_returns_429():
+    """测试租户配额耗尽时返回429"""
+    controller = make_controller(tokens_per_second=10, token_burst=100)
+    async with controller.admit("tenant-a", PRIORITY_INTERACTIVE, 100):
+        pass
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with controller.admit("tenant-a", PRIORITY_INTERACTIVE, 100):
+            pass
+    assert exc_info.value.status_code == 429
+    assert int(exc_info.value.headers["Retry-After"]) >= 1
+
+    # 其他租户不受影响
+    async with controller.admit("tenant-b", PRIORITY_INTERACTIVE, 100):
+        pass
+
+@pytest.mark.asyncio
+async def test_queue_full_returns_503():
+    """测试队列已满时立即拒绝"""
+    controller = make_controller(bulk_max_queue=0)
+    async with controller.admit("tenant", PRIORITY_INTERACTIVE, 10):
+        with pytest.raises(AdmissionRejected) as exc_info:
+            async with controller.admit("tenant", PRIORITY_BULK, 10):
+                pass
+    assert exc_info.value.status_code == 503
+    assert "Retry-After" in exc_info.value.headers
+
+@pytest.mark.asyncio
+async def test_estimated_wait_exceeds_deadline():
+    """测试预计等待超过截止时间时立即拒绝"""
+    controller = make_controller()
+    controller._seconds_per_token = 1.0
+    async with controller.admit("tenant", PRIORITY_INTERACTIVE, 100):
+        with pytest.raises(AdmissionRejected) as exc_info:
+            async with controller.admit("tenant", PRIORITY_INTERACTIVE, 10, deadline=5):
+                pass
+    assert exc_info.value.status_code == 503
+    assert controller.stats()["queued"][PRIORITY_INTERACTIVE] == 0
+
+@pytest.mark.asyncio
+async def test_interactive_runs_before_bulk():
+    """测试交互式请求优先于批量请求"""
+    controller = make_controller()
+    order = []
+
+    async def worker(name, priority):
+        async with controller.admit("tenant", priority, 1):
+            order.append(name)
+
+    async with controller.admit("tenant", PRIORITY_INTERACTIVE, 1):
+        bulk = asyncio.create_task(worker("bulk", PRIORITY_BULK))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(worker("interactive", PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+
+    await asyncio.gather(bulk, interactive)
+    assert order == ["interactive", "bulk"]
+    assert controller.stats()["inflight"] == 0
+
+@pytest.mark.asyncio
+async def test_oversized_request_borrows_from_future_quota():
+    """测试超过桶容量的请求在配额满时放行，欠下的令牌补回之前后续请求返回429"""
+    controller = make_controller(tokens_per_second=10, token_burst=100)
+    async with controller.admit("tenant", PRIORITY_INTERACTIVE, 250):
+        pass
+    assert controller._buckets["tenant"].tokens < -100
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with controller.admit("tenant", PRIORITY_INTERACTIVE, 250):
+            pass
+    assert exc_info.value.status_code == 429
+    # 需要先补回欠额再回满
+    assert int(exc_info.value.headers["Retry-After"]) >= 25
+
+@pytest.mark.asyncio
+async def test_tenant_buckets_are_bounded(monkeypatch):
+    """测试租户令牌桶数量有上限，淘汰最久未使用的桶"""
+    monkeypatch.setattr(admission_module, "MAX_IDLE_BUCKETS", 3)
+    controller = make_controller()
+    for tenant in ["a", "b", "c", "a", "d"]:
+        async with controller.admit(tenant, PRIORITY_INTERACTIVE, 1):
+            pass
+    assert list(controller._buckets) == ["c", "a", "d"]
@@ -0,0 +1,186 @@
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from app.services import fetcher as fetcher_module
+from app.core.http import is_public_address
+from app.services.fetcher import PageFetcher, FetchError
+
+ARTICLE = (
+    "<html><head><title>Test</title></head><body>"
+    "<nav>Home About Contact</nav>"
+    "<article><h1>Translation</h1>"
+    "<p>" + "The first paragraph talks about machine translation quality. " * 8 + "</p>"
+    "<p>" + "The second paragraph covers caching and latency in detail. " * 8 + "</p>"
+    "</article><footer>Copyright</footer></body></html>"
+)
+
+@pytest_asyncio.fixture
+async def page_server():
+    """本地HTTP服务，支持ETag条件请求"""
+    hits = {"full": 0, "not_modified": 0}
+
+    async def article(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            hits["not_modified"] += 1
+            return web.Response(status=304)
+        hits["full"] += 1
+        return web.Response(text=ARTICLE, content_type="text/html", headers={"ETag": '"v1"'})
+
+    async def missing(request):
+        return web.Response(status=404)
+
+    async def unknown_charset(request):
+        return web.Response(body=ARTICLE.encode("utf-8"), headers={"Content-Type": "text/html; charset=x-bogus"})
+
+    async def large(request):
+        """分块发送的大页面，一次读取拿不到全部内容"""
+        response = web.StreamResponse(headers={"Content-Type": "text/html; charset=utf-8"})
+        await response.prepare(request)
+        await response.write(b"<html><body><article>")
+        for i in range(400):
+            await response.write(f"<p>Paragraph {i}: {'filler text ' * 40}</p>".encode("utf-8"))
+        await response.write(b"<p>The final paragraph is here.</p></article></body></html>")
+        await response.write_eof()
+        return response
+
+    async def redirect(request):
+        raise web.HTTPFound(request.query["to"])
+
+    app = web.Application()
+    app.router.add_get("/article", article)
+    app.router.add_get("/missing", missing)
+    app.router.add_get("/legacy", unknown_charset)
+    app.router.add_get("/redirect", redirect)
+    app.router.add_get("/large", large)
+    server = TestServer(app)
+    await server.start_server()
+    yield server, hits
+    await server.close()
+
+@pytest.mark.asyncio
+async def test_fetch_and_extract(page_server):
+    """测试抓取页面并提取正文"""
+    server, _ = page_server
+    fetcher = PageFetcher(allow_private_networks=True)
+    try:
+        text = await fetcher.fetch_text(str(server.make_url("/article")))
+    finally:
+        await fetcher.close()
+
+    assert "first paragraph" in text
+    assert "second paragraph" in text
+    assert "\n\n" in text
+    assert "Copyright" not in text
+
+@pytest.mark.asyncio
+async def test_conditional_request_reuses_text(page_server, monkeypatch):
+    """测试页面未变化时不再重复提取正文"""
+    server, hits = page_server
+    calls = []
+    original = fetcher_module.extract_main_text
+
+    def counting_extract(html, url=None):
+        calls.append(url)
+        return original(html, url)
+
+    monkeypatch.setattr(fetcher_module, "extract_main_text", counting_extract)
+    fetcher = PageFetcher(allow_private_networks=True)
+    url = str(server.make_url("/article"))
+    try:
+        first = await fetcher.fetch_text(url)
+        second = await fetcher.fetch_text(url)
+    finally:
+        await fetcher.close()
+
+    assert first == second
+    assert hits == {"full": 1, "not_modified": 1}
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_fetch_errors(page_server):
+    """测试抓取失败和非法URL"""
+    server, _ = page_server
+    fetcher = PageFetcher(allow_private_networks=True)
+    try:
+        with pytest.raises(FetchError) as exc_info:
+            await fetcher.fetch_text(str(server.make_url("/missing")))
+        assert exc_info.value.status_code == 502
+
+        with pytest.raises(FetchError) as exc_info:
+            await fetcher.fetch_text("file:///etc/passwd")
+        assert exc_info.value.status_code == 400
+    finally:
+        await fetcher.close()
+
+@pytest.mark.asyncio
+async def test_unknown_charset_falls_back_to_utf8(page_server):
+    """测试响应声明了未知编码时按 UTF-8 解码"""
+    server, _ = page_server
+    fetcher = PageFetcher(allow_private_networks=True)
+    try:
+        text = await fetcher.fetch_text(str(server.make_url("/legacy")))
+    finally:
+        await fetcher.close()
+
+    assert "first paragraph" in text
+
+@pytest.mark.asyncio
+async def test_redirects_are_checked_per_hop(page_server):
+    """测试手动跟随重定向，每一跳都重新检查"""
+    server, _ = page_server
+    fetcher = PageFetcher(allow_private_networks=True)
+    try:
+        text = await fetcher.fetch_text(str(server.make_url("/redirect").with_query(to="/article")))
+        assert "first paragraph" in text
+
+        with pytest.raises(FetchError) as exc_info:
+            await fetcher.fetch_text(str(server.make_url("/redirect").with_query(to="file:///etc/passwd")))
+        assert exc_info.value.status_code == 400
+    finally:
+        await fetcher.close()
+
+@pytest.mark.asyncio
+async def test_private_addresses_refused_by_default(page_server):
+    """测试默认拒绝抓取内网地址，包括IP字面量和解析到内网的域名"""
+    server, _ = page_server
+    fetcher = PageFetcher()
+    try:
+        for url in (
+            str(server.make_url("/article")),
+            f"http://localhost:{server.port}/article",
+            "http://169.254.169.254/latest/meta-data/",
+        ):
+            with pytest.raises(FetchError) as exc_info:
+                await fetcher.fetch_text(url)
+            assert exc_info.value.status_code == 403
+    finally:
+        await fetcher.close()
+
+def test_is_public_address():
+    """测试公网地址判断"""
+    assert is_public_address("8.8.8.8")
+    assert is_public_address("2001:4860:4860::8888")
+    for host in ("127.0.0.1", "10.0.0.1", "192.168.1.1", "169.254.169.254", "::1", "::ffff:127.0.0.1", "fd00::1", "example.com"):
+        assert not is_public_address(host)
+
+@pytest.mark.asyncio
+async def test_multi_chunk_page_is_read_completely(page_server):
+    """测试分块传输的大页面完整读取，超过上限时报错而不是截断"""
+    server, _ = page_server
+    url = str(server.make_url("/large"))
+    fetcher = PageFetcher(allow_private_networks=True)
+    try:
+        text = await fetcher.fetch_text(url)
+    finally:
+        await fetcher.close()
+    assert "Paragraph 399" in text
+    assert "The final paragraph is here." in text
+
+    fetcher = PageFetcher(allow_private_networks=True, max_bytes=100 * 1024)
+    try:
+        with pytest.raises(FetchError) as exc_info:
+            await fetcher.fetch_text(url)
+        assert exc_info.value.status_code == 413
+    finally:
+        await fetcher.close()
@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from app.services.cache import TranslationCache
+from app.services.glossary import GLOSSARY_INSTRUCTION, GlossaryCache, extract_terms, relevant_entries
+from app.services.translator import BaseTranslator, TranslationService
+
+DOCUMENT = (
+    "Alice joined OpenAI to work on translation.\n\n"
+    "The weather was mild and the roads were quiet.\n\n"
+    "Later, Alice said OpenAI had changed her view."
+)
+
+TERMS_REQUEST = "[[1]]\nAlice\n\n[[2]]\nOpenAI"
+
+class PromptTranslator(BaseTranslator):
+    """记录请求，逐段返回 译:原文；术语请求可以被阻塞或失败"""
+
+    def __init__(self):
+        self.requests = []
+        self.release_terms = asyncio.Event()
+        self.release_terms.set()
+        self.fail_terms = False
+
+    async def translate(self, text: str, tier=None) -> str:
+        self.requests.append(text)
+        if "\n\n[[1]]\n" not in text:
+            return f"译:{text}"
+        if TERMS_REQUEST in text:
+            await self.release_terms.wait()
+            if self.fail_terms:
+                raise RuntimeError("upstream down")
+        body = "[[1]]\n" + text.split("\n\n[[1]]\n", 1)[1]
+        segments = self.parse_segments(body, body.count("\n[[") + 1)
+        return "\n\n".join(f"[[{i}]]\n译:{segment}" for i, segment in enumerate(segments, 1))
+
+@pytest.fixture
+def service(tmp_path):
+    service = TranslationService()
+    service.translator = PromptTranslator()
+    service.glossaries = GlossaryCache(cache_dir=str(tmp_path))
+    return service
+
+def test_extract_terms_across_chunks():
+    """测试只提取跨块出现的术语，句首的人名在别处出现时也计入"""
+    chunks = [
+        "Alice joined OpenAI. The API was slow.",
+        "Later, Alice used the API at OpenAI. Bob stayed home.",
+        "Bob Smith wrote about TensorFlow.",
+    ]
+    assert extract_terms(chunks) == ["API", "Alice", "OpenAI"]
+    assert relevant_entries({"API": "接口", "Bob": "鲍勃"}, chunks[0]) == {"API": "接口"}
+
+@pytest.mark.asyncio
+async def test_chunks_share_document_glossary(service):
+    """测试首轮翻译术语，含术语的块在提示中带上术语表"""
+    result = await service.translate_chunks(DOCUMENT, chunk_size=60)
+
+    assert result.split("\n\n")[1] == "译:The weather was mild and the roads were quiet."
+    requests = service.translator.requests
+    assert sum(TERMS_REQUEST in request for request in requests) == 1
+    chunk_requests = [request for request in requests if GLOSSARY_INSTRUCTION in request]
+    assert len(chunk_requests) == 2
+    for request in chunk_requests:
+        assert "Alice => 译:Alice" in request
+        assert "OpenAI => 译:OpenAI" in request
+
+@pytest.mark.asyncio
+async def test_chunks_without_terms_do_not_wait(service):
+    """测试术语表完成之前，不含术语的块已经开始翻译"""
+    translator = service.translator
+    translator.release_terms.clear()
+    task = asyncio.ensure_future(service.translate_chunks(DOCUMENT, chunk_size=60))
+    await asyncio.sleep(0.05)
+
+    assert not task.done()
+    assert any("weather" in request for request in translator.requests)
+    assert not any(GLOSSARY_INSTRUCTION in request for request in translator.requests)
+
+    translator.release_terms.set()
+    await task
+    assert sum(GLOSSARY_INSTRUCTION in request for request in translator.requests) == 2
+
+@pytest.mark.asyncio
+async def test_glossary_cached_per_document(service):
+    """测试同一文档再次提交时复用术语表"""
+    await service.translate_chunks(DOCUMENT, chunk_size=60)
+    translator = service.translator
+    translator.requests.clear()
+    # 清空内存层，从磁盘读回
+    service.glossaries._documents.clear()
+    await service.translate_chunks(DOCUMENT, chunk_size=60)
+
+    assert not any(TERMS_REQUEST in request for request in translator.requests)
+    assert sum(GLOSSARY_INSTRUCTION in request for request in translator.requests) == 2
+
+@pytest.mark.asyncio
+async def test_glossary_failure_does_not_fail_document(service):
+    """测试术语翻译失败时正文照常翻译，失败结果不缓存"""
+    service.translator.fail_terms = True
+    result = await service.translate_chunks(DOCUMENT, chunk_size=60)
+
+    assert result.split("\n\n")[0] == "译:Alice joined OpenAI to work on translation."
+    assert "Translation Error" not in result
+    assert service.glossaries._documents == {}
+
+@pytest.mark.asyncio
+async def test_corrupt_glossary_file_is_a_miss(service):
+    """测试磁盘上的术语表损坏时按未命中处理，重新生成并覆盖"""
+    await service.translate_chunks(DOCUMENT, chunk_size=60)
+    (cache_file,) = service.glossaries.cache_dir.glob("*.json")
+    cache_file.write_text("{not json", encoding="utf-8")
+    service.glossaries._documents.clear()
+    service.translator.requests.clear()
+
+    result = await service.translate_chunks(DOCUMENT, chunk_size=60)
+
+    assert "Translation Error" not in result
+    assert sum(TERMS_REQUEST in request for request in service.translator.requests) == 1
+    assert service.glossaries.get(cache_file.stem) == {"Alice": "译:Alice", "OpenAI": "译:OpenAI"}
+
+def test_cache_clear_removes_glossaries(tmp_path):
+    """测试清除翻译缓存时一并删除术语表缓存"""
+    glossaries = GlossaryCache(cache_dir=str(tmp_path))
+    glossaries.set("doc", {"Alice": "爱丽丝"})
+    TranslationCache(cache_dir=str(tmp_path), snapshot_path="").clear()
+    assert not glossaries.cache_dir.exists()
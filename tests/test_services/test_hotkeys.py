@@ -0,0 +1,78 @@
+from app.services.hotkeys import HotKeyCache, SpaceSavingTracker
+from app.utils.encoding import PreparedResponse
+
+def test_space_saving_finds_heavy_hitters():
+    """测试在计数器不足时仍能识别高频key"""
+    tracker = SpaceSavingTracker(capacity=4)
+    for i in range(200):
+        tracker.record("hot")
+        tracker.record(f"cold-{i}")
+
+    top = tracker.top(1)
+    assert top[0]["key"] == "hot"
+    assert tracker.guaranteed("hot") >= 100
+    assert len(tracker.counts) == 4
+
+def test_decay_halves_counts():
+    """测试计数衰减"""
+    tracker = SpaceSavingTracker(capacity=4, decay_window=10)
+    for _ in range(10):
+        tracker.record("a")
+    assert tracker.counts["a"] == 5
+
+def test_pinned_tier():
+    """测试热点key被固定在内存层"""
+    cache = HotKeyCache(capacity=8, min_hits=3, max_pinned=2, decay_window=0)
+    assert not cache.record("k")
+    assert not cache.record("k")
+    assert cache.record("k")
+
+    cache.pin("k", b'{"translated_text":"x"}')
+    assert cache.get("k") == b'{"translated_text":"x"}'
+
+    cache.pin("a", b"1")
+    cache.pin("b", b"2")
+    assert cache.get("k") is None
+    assert cache.stats()["pinned"] == 2
+
+def test_tracker_buckets_track_minimum():
+    """测试计数分桶与计数一致，最小计数无需遍历即可取得"""
+    import random
+
+    rng = random.Random(0)
+    tracker = SpaceSavingTracker(capacity=16, decay_window=500)
+    for _ in range(3000):
+        tracker.record(f"k{int(rng.paretovariate(1.2))}")
+        assert tracker._min_count == min(tracker.counts.values())
+        assert {key for bucket in tracker._buckets.values() for key in bucket} == set(tracker.counts)
+        assert all(tracker.counts[key] == count for count, bucket in tracker._buckets.items() for key in bucket)
+
+def test_pinned_tier_byte_limit():
+    """测试常驻层按字节数淘汰，压缩版本生成后重新计入"""
+    cache = HotKeyCache(capacity=8, min_hits=1, max_pinned=10, max_pinned_bytes=1000, decay_window=0)
+    cache.pin("big", b"x" * 2000)
+    assert cache.get("big") is None
+
+    first = PreparedResponse(b"a" * 400)
+    cache.pin("first", first)
+    cache.pin("second", PreparedResponse(b"b" * 400))
+    assert cache.pinned_bytes == 800
+
+    first.encoded("gzip")
+    cache.pin("first", first)
+    assert cache.pinned_bytes == 800 + len(first.variants["gzip"])
+
+    cache.pin("third", PreparedResponse(b"c" * 400))
+    assert cache.get("second") is None
+    assert cache.get("first") is first
+    assert cache.pinned_bytes <= 1000
+
+    # 分块翻译结果以段落列表常驻，按各段的UTF-8字节数计算
+    cache.clear()
+    cache.pin("chunk-a", ["译" * 100, "文" * 100])
+    assert cache.pinned_bytes == 600
+    cache.pin("chunk-b", ["段" * 100, "落" * 100])
+    assert cache.get("chunk-a") is None
+    assert cache.pinned_bytes == 600
+    cache.pin("chunk-c", ["长" * 1000])
+    assert cache.get("chunk-c") is None
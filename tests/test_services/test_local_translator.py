@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import pytest
+from app.services.batching import BatcherClosedError
+from app.services.translator import (
+    BaseTranslator,
+    LocalTranslator,
+    QuotaExceededError,
+    TranslationService,
+)
+
+class FakeModel:
+    """代替本地模型的批量翻译函数，记录每次推理的批大小"""
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.threads = set()
+
+    def __call__(self, texts):
+        self.batch_sizes.append(len(texts))
+        self.threads.add(threading.current_thread().name)
+        return [f"译:{text}" for text in texts]
+
+class QuotaTranslator(BaseTranslator):
+    async def translate(self, text: str, tier=None) -> str:
+        raise QuotaExceededError("quota exceeded")
+
+@pytest.fixture
+def model():
+    return FakeModel()
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_batched(model):
+    """测试并发请求被合并成一次推理，且推理不在事件循环线程执行"""
+    translator = LocalTranslator("unused", max_batch_size=8, max_wait_ms=20, translate_batch=model)
+    await translator.initialize()
+    try:
+        results = await asyncio.gather(*[translator.translate(f"text {i}") for i in range(8)])
+    finally:
+        await translator.close()
+
+    assert results == [f"译:text {i}" for i in range(8)]
+    assert model.batch_sizes == [8]
+    assert threading.current_thread().name not in model.threads
+
+@pytest.mark.asyncio
+async def test_batch_size_limit(model):
+    """测试批大小上限"""
+    translator = LocalTranslator("unused", max_batch_size=3, max_wait_ms=20, translate_batch=model)
+    await translator.initialize()
+    try:
+        results = await translator.translate_segments([f"s{i}" for i in range(7)])
+    finally:
+        await translator.close()
+
+    assert results == [f"译:s{i}" for i in range(7)]
+    assert max(model.batch_sizes) <= 3
+    assert sum(model.batch_sizes) == 7
+
+@pytest.mark.asyncio
+async def test_batch_failure_propagates():
+    """测试推理失败时所有请求都收到异常"""
+    def broken(texts):
+        raise ValueError("model crashed")
+
+    translator = LocalTranslator("unused", translate_batch=broken)
+    await translator.initialize()
+    try:
+        with pytest.raises(ValueError):
+            await translator.translate("hello")
+    finally:
+        await translator.close()
+
+@pytest.mark.asyncio
+async def test_quota_overflow_to_local(model):
+    """测试上游配额耗尽时溢出到本地模型"""
+    service = TranslationService()
+    service.translator = QuotaTranslator()
+    service.local_translator = LocalTranslator("unused", translate_batch=model)
+
+    result = await service.translate_chunks("First paragraph.\n\nSecond paragraph.")
+    assert result == "译:First paragraph.\n\n译:Second paragraph."
+    await service.local_translator.close()
+
+@pytest.mark.asyncio
+async def test_empty_output_is_an_error():
+    """测试模型对某段输出为空时报错，而不是拼接 None"""
+    translator = LocalTranslator("unused", translate_batch=lambda texts: ["" if "empty" in t else f"译:{t}" for t in texts])
+    await translator.initialize()
+    try:
+        assert await translator.translate_segments(["ok", "empty"]) == ["译:ok", None]
+        with pytest.raises(RuntimeError):
+            await translator.translate("ok\n\nempty")
+    finally:
+        await translator.close()
+
+@pytest.mark.asyncio
+async def test_close_fails_pending_requests():
+    """测试关闭时排队和正在收集的请求收到异常，已开始的推理照常完成"""
+    release = threading.Event()
+
+    def blocking(texts):
+        release.wait(5)
+        return [f"译:{text}" for text in texts]
+
+    translator = LocalTranslator("unused", max_batch_size=1, max_wait_ms=1, translate_batch=blocking)
+    await translator.initialize()
+    running = asyncio.ensure_future(translator.translate("first"))
+    await asyncio.sleep(0.05)
+    waiting = [asyncio.ensure_future(translator.translate(f"text {i}")) for i in range(3)]
+    await asyncio.sleep(0.05)
+
+    closing = asyncio.ensure_future(translator.close())
+    await asyncio.sleep(0.05)
+    for future in waiting:
+        assert future.done()
+        assert isinstance(future.exception(), BatcherClosedError)
+
+    release.set()
+    await closing
+    assert await running == "译:first"
@@ -0,0 +1,80 @@
+import re
+import pytest
+from app.services.translator import BaseTranslator, TranslationService
+
+class FlakyTranslator(BaseTranslator):
+    """首次调用丢失第二个段落、篡改第三个段落的编号"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def translate(self, text: str, tier=None) -> str:
+        self.requests.append(text)
+        if len(self.requests) == 1 and "[[1]]" in text:
+            return "[[1]]\n译文一\n\n[[3]]\n译文三\n\n[[3]]\n译文四"
+        count = len(re.findall(r'^\[\[\d+\]\]$', text, re.M))
+        if count:
+            return "\n\n".join(f"[[{i}]]\n译:{i}" for i in range(1, count + 1))
+        return "单段译文"
+
+@pytest.fixture
+def service():
+    service = TranslationService()
+    service.translator = FlakyTranslator()
+    return service
+
+def test_parse_segments_detects_missing_and_duplicates():
+    """测试编号段落解析"""
+    translator = FlakyTranslator()
+    parsed = translator.parse_segments("[[1]]\n甲\n[[2]]\n\n[[3]]\n丙\n[[3]]\n丁\n[[9]]\n越界", 4)
+    assert parsed == ["甲", None, None, None]
+
+def test_format_segments_round_trip():
+    """测试编号格式可以被解析回来"""
+    translator = FlakyTranslator()
+    segments = ["first line\nsecond line", "another paragraph"]
+    assert translator.parse_segments(translator.format_segments(segments), 2) == segments
+
+def test_bracketed_source_text_round_trip():
+    """测试原文中的 [[n]] 不会被当作编号标记"""
+    translator = FlakyTranslator()
+    segments = ["See note [[2]] below.", "[[1]] starts this line", "Second para"]
+    formatted = translator.format_segments(segments)
+    assert translator.parse_segments(formatted, 3) == segments
+    # 译文保留了原文中的标记时同样不会错位
+    reply = "[[1]]\n见下方注释 [[2]]。\n\n[[2]]\n\u2060[[1]] 开始这一行\n\n[[3]]\n第二段"
+    assert translator.parse_segments(reply, 3) == ["见下方注释 [[2]]。", "[[1]] 开始这一行", "第二段"]
+
+@pytest.mark.asyncio
+async def test_only_missing_segments_are_retried(service):
+    """测试只重发缺失或错位的段落"""
+    text = "Paragraph one.\n\nParagraph two.\n\nParagraph three.\n\nParagraph four."
+    result = await service.translate_chunks(text)
+
+    requests = service.translator.requests
+    assert len(requests) == 2
+    # 重试请求只包含第2、3、4段
+    assert "Paragraph one." not in requests[1]
+    assert "Paragraph two." in requests[1]
+    assert result.split("\n\n") == ["译文一", "译:1", "译:2", "译:3"]
+
+@pytest.mark.asyncio
+async def test_single_segment_skips_protocol(service):
+    """测试单段落直接翻译"""
+    result = await service.translate_chunks("Just one paragraph.")
+    assert result == "单段译文"
+    assert "[[1]]" not in service.translator.requests[0]
+
+@pytest.mark.asyncio
+async def test_persistent_failure_marks_only_failed_segments(service):
+    """测试多次失败后只有失败的段落标记为错误"""
+    class DroppingTranslator(FlakyTranslator):
+        async def translate(self, text: str, tier=None) -> str:
+            self.requests.append(text)
+            return "[[1]]\n甲" if "[[2]]" in text else ""
+
+    service.translator = DroppingTranslator()
+    result = await service.translate_chunks("One.\n\nTwo.")
+    first, second = result.split("\n\n")
+    assert first == "甲"
+    assert second.startswith("[Translation Error")
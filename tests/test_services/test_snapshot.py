@@ -0,0 +1,93 @@
+import pytest
+from app.services.cache import TranslationCache
+from app.services.snapshot import (
+    CacheSnapshot,
+    SnapshotError,
+    export_cache,
+    import_snapshot,
+    merge_snapshots,
+)
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TranslationCache(cache_dir=str(tmp_path / "cache"), snapshot_path="")
+    for i in range(50):
+        cache.set(f"text {i}", f"译文 {i}")
+    return cache
+
+def test_export_and_lookup(cache, tmp_path):
+    """测试导出快照后按key查找"""
+    path = tmp_path / "cache.snap"
+    assert export_cache(str(cache.cache_dir), str(path)) == 50
+
+    with CacheSnapshot(str(path)) as snapshot:
+        assert len(snapshot) == 50
+        assert snapshot.get(cache._get_cache_key("text 7")) == "译文 7"
+        assert snapshot.get(cache._get_cache_key("missing")) is None
+
+def test_snapshot_layer_under_cache_dir(cache, tmp_path):
+    """测试快照作为只读层，新写入的缓存优先"""
+    path = tmp_path / "cache.snap"
+    export_cache(str(cache.cache_dir), str(path))
+
+    layered = TranslationCache(cache_dir=str(tmp_path / "fresh"), snapshot_path=str(path))
+    assert layered.get("text 3") == "译文 3"
+    layered.set("text 3", "新译文")
+    assert layered.get("text 3") == "新译文"
+    layered.clear()
+    assert layered.get("text 3") == "译文 3"
+
+def test_merge_prefers_later_snapshots(tmp_path):
+    """测试合并快照时后面的快照优先"""
+    first = TranslationCache(cache_dir=str(tmp_path / "a"), snapshot_path="")
+    first.set("shared", "旧")
+    first.set("only a", "甲")
+    second = TranslationCache(cache_dir=str(tmp_path / "b"), snapshot_path="")
+    second.set("shared", "新")
+    second.set("only b", "乙")
+    export_cache(str(first.cache_dir), str(tmp_path / "a.snap"))
+    export_cache(str(second.cache_dir), str(tmp_path / "b.snap"))
+
+    merged = tmp_path / "merged.snap"
+    count = merge_snapshots([str(tmp_path / "a.snap"), str(tmp_path / "b.snap")], str(merged))
+    assert count == 3
+
+    target = TranslationCache(cache_dir=str(tmp_path / "c"), snapshot_path="")
+    assert import_snapshot(str(merged), str(target.cache_dir)) == 3
+    assert target.get("shared") == "新"
+    assert target.get("only a") == "甲"
+    assert target.get("only b") == "乙"
+
+def test_invalid_snapshot(tmp_path):
+    """测试无效快照文件"""
+    path = tmp_path / "bad.snap"
+    path.write_bytes(b"not a snapshot at all")
+    with pytest.raises(SnapshotError):
+        CacheSnapshot(str(path))
+
+def test_short_snapshot_file(tmp_path):
+    """测试不足一个文件头的快照文件报 SnapshotError，缓存在没有快照层的情况下启动"""
+    path = tmp_path / "short.snap"
+    path.write_bytes(b"BTSNAP")
+    with pytest.raises(SnapshotError):
+        CacheSnapshot(str(path))
+
+    cache = TranslationCache(cache_dir=str(tmp_path / "cache"), snapshot_path=str(path))
+    assert cache.snapshot is None
+
+def test_corrupt_index_entry(cache, tmp_path):
+    """测试索引中的偏移越界时按未命中处理，导出时报错"""
+    path = tmp_path / "cache.snap"
+    export_cache(str(cache.cache_dir), str(path))
+    data = bytearray(path.read_bytes())
+    # 第一条索引的偏移改到文件末尾之外
+    data[16 + 16:16 + 24] = (len(data) + 1).to_bytes(8, "little")
+    path.write_bytes(bytes(data))
+
+    with CacheSnapshot(str(path)) as snapshot:
+        key = snapshot._entry(1)[0].hex()
+        assert snapshot.get_record(key) is not None
+        first = snapshot._mm[16:32].hex()
+        assert snapshot.get(first) is None
+        with pytest.raises(SnapshotError):
+            list(snapshot.iter_raw())
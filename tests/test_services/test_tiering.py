@@ -0,0 +1,175 @@
+import pytest
+from types import SimpleNamespace
+from app.services.tiering import (
+    TierPolicy,
+    TierStats,
+    TIER_FAST,
+    TIER_STANDARD,
+    TIER_LARGE,
+    CONTENT_CODE,
+    CONTENT_LABEL,
+)
+from app.services.translator import (
+    BaseTranslator,
+    OpenAITranslator,
+    TranslationService,
+    TruncatedOutputError,
+)
+from app.core.config import get_settings
+
+settings = get_settings()
+
+PROSE = (
+    "The committee reviewed the proposal in detail and agreed that the new schedule "
+    "would give every team enough time to finish their work before the release. "
+) * 3
+TECHNICAL = (
+    "Asynchronous serialization requires deterministic synchronization between heterogeneous "
+    "infrastructure components, otherwise nondeterministic interleavings compromise consistency "
+    "guarantees across geographically distributed replication boundaries. "
+) * 6
+
+class RecordingTranslator(BaseTranslator):
+    """记录每次调用使用的档位"""
+
+    def __init__(self):
+        self.tiers = []
+
+    async def translate(self, text: str, tier=None) -> str:
+        self.tiers.append(tier)
+        return "译文"
+
+@pytest.fixture
+def policy():
+    return TierPolicy(enabled=True)
+
+def test_short_label_uses_fast_tier(policy):
+    """测试界面短标签走快速档"""
+    choice = policy.choose(["Save changes"])
+    assert choice.name == TIER_FAST
+    assert choice.content_type == CONTENT_LABEL
+    assert choice.model == settings.TIER_FAST_MODEL
+    assert choice.max_tokens == settings.TIER_MIN_OUTPUT_TOKENS
+
+def test_prose_and_technical_tiers(policy):
+    """测试普通正文走标准档，长而复杂的段落走大模型档"""
+    assert policy.choose([PROSE]).name == TIER_STANDARD
+    assert policy.choose([TECHNICAL]).name == TIER_LARGE
+    assert policy.choose(["```python\nprint('hi')\n```"]).content_type == CONTENT_CODE
+
+def test_max_tokens_follow_input_length(policy):
+    """测试 max_tokens 随输入长度增长并受上限约束"""
+    short = policy.choose([PROSE]).max_tokens
+    longer = policy.choose([PROSE * 4]).max_tokens
+    assert short < longer
+    assert short <= settings.TIER_MAX_OUTPUT_TOKENS
+
+def test_long_paragraph_is_not_capped_below_estimate(policy):
+    """测试估算译文超过上限的长段落不设 max_tokens，重试时也不会被截在上限处"""
+    paragraph = PROSE * 100
+    assert len(paragraph) > 20000
+    for attempt in range(3):
+        assert policy.choose([paragraph], attempt=attempt).max_tokens is None
+    # 短块首次有上限，重试翻倍超过上限后不再限制
+    assert policy.choose([PROSE], attempt=0).max_tokens is not None
+    assert policy.choose([PROSE], attempt=5).max_tokens is None
+
+def test_retry_escalates_tier(policy):
+    """测试重试时升档并放宽 max_tokens"""
+    first = policy.choose(["Save changes"])
+    retry = policy.choose(["Save changes"], attempt=1)
+    assert retry.name == TIER_STANDARD
+    assert retry.max_tokens == first.max_tokens * 2
+
+def test_disabled_policy_keeps_default_model():
+    """测试关闭分档时统一使用标准档且不限制 max_tokens"""
+    choice = TierPolicy(enabled=False).choose(["Save changes"])
+    assert choice.name == TIER_STANDARD
+    assert choice.max_tokens is None
+
+def test_tier_stats_summary(policy):
+    """测试档位统计"""
+    stats = TierStats()
+    choice = policy.choose([PROSE])
+    stats.record(TIER_STANDARD, choice, 1, 0.2, output_tokens=choice.max_tokens // 2)
+    stats.record(TIER_STANDARD, choice, 1, 0.4, ok=False)
+    summary = stats.stats()[TIER_STANDARD]
+    assert summary["calls"] == 2
+    assert summary["errors"] == 1
+    assert summary["output_ratio"] == 0.25
+    assert summary["latency_p95_ms"] == 400.0
+
+@pytest.mark.asyncio
+async def test_service_routes_chunks_by_tier():
+    """测试服务按块选择档位并记录统计"""
+    service = TranslationService()
+    service.tiering = TierPolicy(enabled=True)
+    service.translator = RecordingTranslator()
+
+    await service.translate_chunks("Cancel", chunk_size=100)
+    await service.translate_chunks(TECHNICAL, chunk_size=100)
+
+    assert [tier.name for tier in service.translator.tiers] == [TIER_FAST, TIER_LARGE]
+    stats = service.tier_stats.stats()
+    assert stats[TIER_FAST]["calls"] == 1
+    assert stats[TIER_LARGE]["output_tokens"] > 0
+
+class TruncatingTranslator(BaseTranslator):
+    """max_tokens 不足时只返回部分译文"""
+
+    def __init__(self, needed_tokens: int):
+        self.needed_tokens = needed_tokens
+        self.calls = []
+
+    async def translate(self, text: str, tier=None) -> str:
+        self.calls.append((text, tier))
+        numbered = "[[1]]" in text.split("\n\n", 1)[-1]
+        if tier.max_tokens < self.needed_tokens:
+            partial = "[[1]]\n甲\n\n[[2]]\n乙的前半" if numbered else "译文的前半"
+            raise TruncatedOutputError("truncated", partial)
+        return "[[1]]\n乙\n\n[[2]]\n丙" if numbered else "完整译文"
+
+@pytest.mark.asyncio
+async def test_truncated_single_paragraph_is_retried_with_higher_tier():
+    """测试单段落译文被截断时不当作成功，升档并放宽 max_tokens 后重试"""
+    service = TranslationService()
+    service.tiering = TierPolicy(enabled=True)
+    service.translator = TruncatingTranslator(settings.TIER_MIN_OUTPUT_TOKENS * 2)
+
+    result = await service.translate_chunks("Save changes")
+
+    assert result == "完整译文"
+    (_, first), (_, second) = service.translator.calls
+    assert (first.name, second.name) == (TIER_FAST, TIER_STANDARD)
+    assert second.max_tokens == first.max_tokens * 2
+
+@pytest.mark.asyncio
+async def test_truncated_segments_retry_last_and_missing():
+    """测试编号译文被截断时，最后一个（可能不完整的）段落和缺失的段落一起重试"""
+    service = TranslationService()
+    service.tiering = TierPolicy(enabled=True)
+    service.translator = TruncatingTranslator(settings.TIER_MIN_OUTPUT_TOKENS * 2)
+
+    result = await service.translate_chunks("One.\n\nTwo.\n\nThree.")
+
+    assert result.split("\n\n") == ["甲", "乙", "丙"]
+    retry_prompt, _ = service.translator.calls[1]
+    assert "One." not in retry_prompt
+    assert "Two." in retry_prompt and "Three." in retry_prompt
+
+@pytest.mark.asyncio
+async def test_openai_finish_reason_length_raises():
+    """测试 OpenAI 返回 finish_reason=length 时抛出截断错误"""
+    translator = OpenAITranslator(api_key="test")
+
+    async def create(**kwargs):
+        message = SimpleNamespace(content="译文的前半")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="length")])
+
+    translator.openai_client.chat.completions.create = create
+    try:
+        with pytest.raises(TruncatedOutputError) as excinfo:
+            await translator.translate("Some text", tier=TierPolicy(enabled=True).choose(["Some text"]))
+        assert excinfo.value.text == "译文的前半"
+    finally:
+        await translator.close()
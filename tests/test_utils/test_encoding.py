@@ -0,0 +1,55 @@
+import gzip
+import pytest
+from app.utils.encoding import (
+    COMPRESSORS,
+    DECOMPRESSORS,
+    BodyTooLargeError,
+    UnsupportedEncodingError,
+    PreparedResponse,
+    compress,
+    decode_json,
+    decompress,
+    encode_json,
+    negotiate_encoding,
+)
+
+def test_encode_json_compact_utf8():
+    """测试JSON输出紧凑且不转义中文"""
+    body = encode_json({"translated_text": "你好"})
+    assert body == '{"translated_text":"你好"}'.encode("utf-8")
+    assert decode_json(body) == {"translated_text": "你好"}
+
+def test_negotiate_encoding():
+    """测试压缩算法协商"""
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=0.5, deflate") == "gzip"
+    assert negotiate_encoding("gzip, br;q=0") == "gzip"
+    assert negotiate_encoding("*") == next(iter(COMPRESSORS))
+    assert negotiate_encoding("gzip;q=0.5, br", available=["gzip", "br"]) == "br"
+
+@pytest.mark.parametrize("encoding", list(DECOMPRESSORS))
+def test_compress_round_trip(encoding):
+    """测试请求体支持的压缩算法往返"""
+    body = encode_json({"translated_text": "译文" * 1000})
+    assert decompress(compress(body, encoding), encoding, len(body)) == body
+
+def test_decompress_limits():
+    """测试解压大小限制和未知编码"""
+    bomb = gzip.compress(b"0" * 100000)
+    with pytest.raises(BodyTooLargeError):
+        decompress(bomb, "gzip", 1000)
+    with pytest.raises(UnsupportedEncodingError):
+        decompress(b"data", "compress", 1000)
+    # brotli 无法限制解压输出，请求体不接受 br
+    with pytest.raises(UnsupportedEncodingError):
+        decompress(b"\x1b\xff\xff", "br", 1000)
+
+def test_prepared_response_caches_variants():
+    """测试预编码响应只压缩一次"""
+    prepared = PreparedResponse.from_data({"translated_text": "x" * 5000})
+    first = prepared.encoded("gzip")
+    assert prepared.encoded("gzip") is first
+    assert prepared.encoded(None) is prepared.body
+    assert gzip.decompress(first) == prepared.body